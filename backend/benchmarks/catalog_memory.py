@@ -0,0 +1,108 @@
+"""
+Memory per cached lesson: raw Supabase rows vs compact catalog rows.
+
+    cd backend && python -m benchmarks.catalog_memory --courses 20 --lessons 50
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+import uuid
+
+from services.compact import compact_row
+
+
+def _lesson(module_id: str, index: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "module_id": module_id,
+        "title": f"Lekcja {index}: pętle i warunki",
+        "description": "Poznaj pętle for i while na prostych przykładach.",
+        "lesson_type": "exercise",
+        "language": "python",
+        "order_index": index,
+        "xp_reward": 10,
+        "estimated_minutes": 15,
+        "is_locked": False,
+        "content": {
+            "type": "exercise",
+            "instruction": "Napisz pętlę, która wypisze liczby od 1 do 10. " * 4,
+            "starterCode": "for i in range(1, 11):\n    pass\n",
+            "solution": "for i in range(1, 11):\n    print(i)\n",
+            "hint": "Użyj funkcji range().",
+            "testCases": [
+                {"input": "", "expectedOutput": "\n".join(str(i) for i in range(1, 11))},
+            ],
+        },
+        "created_at": "2024-01-01T00:00:00+00:00",
+        "updated_at": "2024-01-02T00:00:00+00:00",
+    }
+
+
+def build_catalog_json(courses: int, modules: int, lessons: int) -> str:
+    """JSON as PostgREST returns it for CATALOG_SELECT"""
+    catalog = []
+    for course_index in range(courses):
+        course_id = str(uuid.uuid4())
+        course_modules = []
+        for module_index in range(modules):
+            module_id = str(uuid.uuid4())
+            course_modules.append({
+                "id": module_id,
+                "course_id": course_id,
+                "title": f"Moduł {module_index}",
+                "description": "Podstawy",
+                "order_index": module_index,
+                "icon_emoji": "📚",
+                "created_at": "2024-01-01T00:00:00+00:00",
+                "lessons": [_lesson(module_id, index) for index in range(lessons)],
+            })
+        catalog.append({
+            "id": course_id,
+            "title": f"Kurs {course_index}",
+            "description": "Kurs programowania",
+            "difficulty": "beginner",
+            "language": "python",
+            "color": "#3B82F6",
+            "icon_url": None,
+            "estimated_hours": 10,
+            "is_published": True,
+            "order_index": course_index,
+            "created_at": "2024-01-01T00:00:00+00:00",
+            "modules": course_modules,
+        })
+    return json.dumps(catalog)
+
+
+def measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    data = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del data
+    return used
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--modules", type=int, default=5)
+    parser.add_argument("--lessons", type=int, default=10, help="lessons per module")
+    args = parser.parse_args()
+
+    payload = build_catalog_json(args.courses, args.modules, args.lessons)
+    total_lessons = args.courses * args.modules * args.lessons
+
+    raw = measure(lambda: json.loads(payload))
+    compact = measure(lambda: [compact_row(course) for course in json.loads(payload)])
+
+    print(f"{total_lessons} lessons, {len(payload) / total_lessons:.0f} bytes of JSON per lesson")
+    print(f"raw rows:     {raw / total_lessons:8.0f} bytes per lesson")
+    print(f"compact rows: {compact / total_lessons:8.0f} bytes per lesson ({compact / raw:.0%})")
+
+
+if __name__ == "__main__":
+    main()
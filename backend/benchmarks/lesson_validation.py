@@ -0,0 +1,96 @@
+"""
+Lesson content validation cost: untagged union vs discriminated union.
+
+Measures the path that validates many lessons at once: bulk imports
+(LessonCreate). Reads (LessonResponse) serve content as stored.
+
+    cd backend && python -m benchmarks.lesson_validation --lessons 2000
+"""
+from pydantic import TypeAdapter
+from typing import List
+import argparse
+import time
+
+from models import (
+    LessonBase,
+    LessonCreate,
+    ExerciseContent,
+    TheoryContent,
+    QuizContent,
+    ProjectContent,
+)
+
+
+class UntaggedLessonCreate(LessonBase):
+    """LessonCreate as it was before the content union was tagged"""
+    module_id: str
+    content: ExerciseContent | TheoryContent | QuizContent | ProjectContent
+
+
+CONTENTS = [
+    {"type": "theory", "content": "Zmienne przechowują wartości. " * 20, "exampleCode": "x = 1"},
+    {
+        "type": "exercise",
+        "instruction": "Wypisz liczby od 1 do 10.",
+        "starterCode": "for i in range(1, 11):\n    pass\n",
+        "solution": "for i in range(1, 11):\n    print(i)\n",
+        "testCases": [{"input": "", "expectedOutput": "1\n2\n3"}],
+    },
+    {
+        "type": "quiz",
+        "question": "Co wypisze print(2 ** 3)?",
+        "options": [{"text": "6", "isCorrect": False}, {"text": "8", "isCorrect": True}],
+    },
+    {
+        "type": "project",
+        "description": "Kalkulator w konsoli",
+        "requirements": ["dodawanie", "odejmowanie"],
+    },
+]
+
+
+def create_payloads(count: int) -> List[dict]:
+    return [
+        {
+            "module_id": "module",
+            "title": f"Lekcja {index}",
+            "lessonType": CONTENTS[index % 4]["type"],
+            "language": "python",
+            "orderIndex": index,
+            "content": CONTENTS[index % 4],
+        }
+        for index in range(count)
+    ]
+
+
+def per_lesson_us(run, count: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best / count * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lessons", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = create_payloads(args.lessons)
+
+    results = []
+    for label, model in (("untagged union", UntaggedLessonCreate), ("discriminated", LessonCreate)):
+        adapter = TypeAdapter(List[model])
+        results.append((
+            f"import   {label}",
+            per_lesson_us(lambda: adapter.validate_python(payloads), args.lessons, args.repeat)
+        ))
+
+    for label, us in results:
+        print(f"{label:<28} {us:7.2f} us per lesson")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Query latency of the in-process search index.
+
+    cd backend && python -m benchmarks.search_index --courses 20 --lessons 50
+"""
+import argparse
+import json
+import time
+
+from benchmarks.catalog_memory import build_catalog_json
+from services.compact import compact_row
+from services.search_index import SearchIndex, tokenize
+
+QUERIES = ["pętle", "petl", "kurs 1", "warunki i pętle", "range", "xyz"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--modules", type=int, default=5)
+    parser.add_argument("--lessons", type=int, default=10, help="lessons per module")
+    parser.add_argument("--runs", type=int, default=1000)
+    args = parser.parse_args()
+
+    courses = [compact_row(course) for course in json.loads(
+        build_catalog_json(args.courses, args.modules, args.lessons)
+    )]
+
+    index = SearchIndex()
+    started = time.perf_counter()
+    for course in courses:
+        index._index_course(course, course["id"])
+    built = time.perf_counter() - started
+    print(f"{args.courses * args.modules * args.lessons} lessons indexed in {built * 1000:.1f} ms")
+
+    for query in QUERIES:
+        tokens = tokenize(query)
+        started = time.perf_counter()
+        for _ in range(args.runs):
+            matches = index._scores(tokens)
+        elapsed = (time.perf_counter() - started) / args.runs
+        print(f"{query!r:22} {len(matches):5} matches {elapsed * 1e6:8.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Checks and times the search_content RPC (migrations/003_full_text_search.sql)
+against a local Postgres.
+
+Creates minimal catalog tables in a scratch schema, applies the migration
+there, checks prefix matching, diacritics, the published-only filter, the
+limits, the row order and that the GIN indexes can serve the search, then
+drops the schema again. Exits non-zero when a
+check fails.
+
+    cd backend && python -m benchmarks.search_postgres --dsn postgresql://postgres@localhost/postgres
+"""
+from pathlib import Path
+from typing import List
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+import asyncpg
+
+from constants import SEARCH_COURSE_LIMIT, SEARCH_LESSON_LIMIT
+
+MIGRATION = Path(__file__).resolve().parent.parent / "migrations" / "003_full_text_search.sql"
+SCHEMA = "search_check"
+
+TABLES = """
+CREATE TABLE courses (
+  id uuid PRIMARY KEY, title text NOT NULL, description text,
+  is_published boolean NOT NULL DEFAULT false, order_index integer DEFAULT 0
+);
+CREATE TABLE modules (
+  id uuid PRIMARY KEY, course_id uuid NOT NULL REFERENCES courses (id),
+  title text NOT NULL, order_index integer DEFAULT 0
+);
+CREATE TABLE lessons (
+  id uuid PRIMARY KEY, module_id uuid NOT NULL REFERENCES modules (id),
+  title text NOT NULL, description text, order_index integer DEFAULT 0
+);
+"""
+
+LOOPS_ID = uuid.uuid4()
+VARIABLES_ID = uuid.uuid4()
+DRAFT_ID = uuid.uuid4()
+EXTRA_COURSES = SEARCH_COURSE_LIMIT + 2
+EXTRA_LESSONS = SEARCH_LESSON_LIMIT + 2
+
+QUERIES = ["pętl", "petle", "pyth", "lekcja", "kurs dodatkowy", "xyz"]
+
+
+async def _seed(conn: asyncpg.Connection) -> None:
+    courses = [
+        (LOOPS_ID, "Pętle w Pythonie", "Kurs o pętlach for i while", True, 0),
+        (VARIABLES_ID, "Zmienne", "Typy danych, potem pętle", True, 1),
+        (DRAFT_ID, "Pętle zaawansowane", "Szkic", False, 2),
+    ] + [
+        (uuid.uuid4(), f"Kurs dodatkowy {index}", "", True, 10 + index)
+        for index in range(EXTRA_COURSES)
+    ]
+    await conn.executemany(
+        "INSERT INTO courses (id, title, description, is_published, order_index) VALUES ($1, $2, $3, $4, $5)",
+        courses
+    )
+
+    loops_module, draft_module = uuid.uuid4(), uuid.uuid4()
+    await conn.executemany(
+        "INSERT INTO modules (id, course_id, title, order_index) VALUES ($1, $2, $3, $4)",
+        [(loops_module, LOOPS_ID, "Podstawy", 0), (draft_module, DRAFT_ID, "Szkic", 0)]
+    )
+    lessons = [
+        (uuid.uuid4(), loops_module, f"Lekcja {index}: pętla for", "", index)
+        for index in range(EXTRA_LESSONS)
+    ] + [(uuid.uuid4(), draft_module, "Lekcja ukryta: pętla while", "", 0)]
+    await conn.executemany(
+        "INSERT INTO lessons (id, module_id, title, description, order_index) VALUES ($1, $2, $3, $4, $5)",
+        lessons
+    )
+
+
+async def _search(conn: asyncpg.Connection, query: str, *limits: int) -> List[asyncpg.Record]:
+    placeholders = ", ".join(f"${index}" for index in range(1, len(limits) + 2))
+    return await conn.fetch(f"SELECT * FROM search_content({placeholders})", query, *limits)
+
+
+async def _check(conn: asyncpg.Connection) -> List[str]:
+    failures = []
+
+    def check(name: str, passed: bool) -> None:
+        print(f"{'ok  ' if passed else 'FAIL'} {name}")
+        if not passed:
+            failures.append(name)
+
+    def ids(rows, kind=None):
+        return [row["id"] for row in rows if kind is None or row["type"] == kind]
+
+    rows = await _search(conn, "pyth")
+    check("prefix: 'pyth' finds 'Pythonie'", ids(rows, "course") == [LOOPS_ID])
+    rows = await _search(conn, "pętl w")
+    check("prefix: every word matches as a prefix", ids(rows, "course") == [LOOPS_ID])
+
+    accented = ids(await _search(conn, "pętle"))
+    check("unaccent: 'petle' matches 'Pętle'", ids(await _search(conn, "petle")) == accented)
+    check("unaccent: 'PĘTLE' matches 'Pętle'", ids(await _search(conn, "PĘTLE")) == accented)
+
+    rows = await _search(conn, "pętl")
+    check("published only: no unpublished course", DRAFT_ID not in ids(rows))
+    check("published only: no lesson of an unpublished course", not await _search(conn, "ukryta"))
+
+    types = [row["type"] for row in rows]
+    check("order: courses before lessons", types == sorted(types, key=lambda kind: kind != "course"))
+    check("order: title hits rank above description hits", ids(rows, "course") == [LOOPS_ID, VARIABLES_ID])
+    for kind in ("course", "lesson"):
+        ranks = [row["rank"] for row in rows if row["type"] == kind]
+        check(f"order: {kind} ranks descend", ranks == sorted(ranks, reverse=True))
+    lessons = [row["title"] for row in await _search(conn, "lekcja")]
+    check(
+        "order: equal ranks keep catalog order",
+        lessons == [f"Lekcja {index}: pętla for" for index in range(SEARCH_LESSON_LIMIT)]
+    )
+
+    rows = await _search(conn, "kurs dodatkowy")
+    check(f"limits: {SEARCH_COURSE_LIMIT} courses by default", len(ids(rows, "course")) == SEARCH_COURSE_LIMIT)
+    rows = await _search(conn, "kurs dodatkowy", 2, SEARCH_LESSON_LIMIT)
+    check("limits: p_course_limit", len(ids(rows, "course")) == 2)
+    rows = await _search(conn, "lekcja")
+    check(f"limits: {SEARCH_LESSON_LIMIT} lessons by default", len(ids(rows, "lesson")) == SEARCH_LESSON_LIMIT)
+    rows = await _search(conn, "lekcja", SEARCH_COURSE_LIMIT, 3)
+    check("limits: p_lesson_limit", len(ids(rows, "lesson")) == 3)
+
+    # The seed is too small for the planner to pick the indexes on its own
+    async with conn.transaction():
+        await conn.execute("SET LOCAL enable_seqscan = off")
+        plan = "\n".join(row[0] for row in await conn.fetch("EXPLAIN SELECT * FROM search_content('pętl')"))
+    for index in ("courses_search_idx", "lessons_search_idx"):
+        check(f"index: search uses {index}", index in plan)
+
+    return failures
+
+
+async def _time(conn: asyncpg.Connection, runs: int) -> None:
+    for query in QUERIES:
+        started = time.perf_counter()
+        for _ in range(runs):
+            rows = await _search(conn, query)
+        elapsed = (time.perf_counter() - started) / runs
+        print(f"{query!r:22} {len(rows):5} rows {elapsed * 1000:8.2f} ms")
+
+
+async def run(dsn: str, runs: int) -> bool:
+    conn = await asyncpg.connect(dsn)
+    try:
+        # The migration refers to public.unaccent; create it there before
+        # search_path points at the scratch schema
+        await conn.execute("CREATE EXTENSION IF NOT EXISTS unaccent SCHEMA public")
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+        await conn.execute(f"SET search_path TO {SCHEMA}, public")
+        await conn.execute(TABLES)
+        await conn.execute(MIGRATION.read_text())
+        await _seed(conn)
+        await conn.execute("ANALYZE")
+
+        failures = await _check(conn)
+        await _time(conn, runs)
+        return not failures
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dsn", default=os.environ.get("SEARCH_CHECK_DSN"), help="defaults to $SEARCH_CHECK_DSN")
+    parser.add_argument("--runs", type=int, default=100)
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("pass --dsn or set SEARCH_CHECK_DSN")
+
+    if not asyncio.run(run(args.dsn, args.runs)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
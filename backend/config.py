@@ -1,12 +1,31 @@
 from pydantic_settings import BaseSettings
-from pydantic import field_validator, Field
+from pydantic import field_validator, model_validator, Field
 from typing import List
+from urllib.parse import urlparse
+
+
+# Hosts a plain-HTTP Supabase URL may point at (a local stand-in server)
+LOCAL_HOSTS = {"localhost", "127.0.0.1"}
 
 
 class Settings(BaseSettings):
     supabase_url: str = Field(..., description="Supabase project URL")
     supabase_anon_key: str = Field(..., description="Supabase anonymous key")
     supabase_service_key: str = Field(default="", description="Supabase service role key (optional)")
+    supabase_replica_urls: str = Field(
+        default="",
+        description="Comma-separated read replica URLs used for read-only endpoints (optional)"
+    )
+    replica_health_check_seconds: float = Field(
+        default=15.0,
+        gt=0,
+        description="Interval between read replica health checks"
+    )
+    read_your_writes_seconds: float = Field(
+        default=5.0,
+        ge=0,
+        description="How long a caller's reads stay on the primary after it writes"
+    )
     
     backend_url: str = Field(
         default="https://web-version-of-desktop-app.onrender.com/",
@@ -25,18 +44,52 @@ class Settings(BaseSettings):
         min_length=32,
         description="JWT secret key (min 32 characters)"
     )
+    request_deadline_seconds: float = Field(
+        default=10.0,
+        gt=0,
+        description="Time budget for all database calls made while serving one request"
+    )
+    circuit_breaker_failure_threshold: int = Field(
+        default=5,
+        ge=1,
+        description="Consecutive database failures before requests fail fast with 503"
+    )
+    circuit_breaker_reset_seconds: float = Field(
+        default=30.0,
+        gt=0,
+        description="How long the circuit stays open before a trial request is allowed"
+    )
+    slow_query_threshold_ms: float = Field(
+        default=500.0,
+        ge=0,
+        description="Database calls at least this slow are written to the slow-query log"
+    )
+    content_pack_dir: str = Field(
+        default="",
+        description="Directory the static content pack is kept up to date in (disabled when empty)"
+    )
+    search_mode: str = Field(
+        default="memory",
+        pattern="^(memory|postgres)$",
+        description="GET /search backend: in-process index or Postgres full-text search (migration 003)"
+    )
     environment: str = Field(
         default="development",
         pattern="^(development|production|testing)$",
         description="Application environment"
     )
 
-    @field_validator('supabase_url')
-    @classmethod
-    def validate_supabase_url(cls, v: str) -> str:
-        if not v.startswith('https://'):
-            raise ValueError("Supabase URL must use HTTPS")
-        return v
+    @model_validator(mode='after')
+    def validate_supabase_urls(self) -> "Settings":
+        for url in [self.supabase_url, *self.replica_urls_list]:
+            parsed = urlparse(url)
+            if parsed.scheme == "https" and parsed.hostname:
+                continue
+            # Plain HTTP is only accepted for a local stand-in server, outside production
+            if parsed.scheme == "http" and parsed.hostname in LOCAL_HOSTS and not self.is_production:
+                continue
+            raise ValueError(f"Supabase URL must use HTTPS: {url}")
+        return self
     
     @field_validator('cors_origins')
     @classmethod
@@ -60,6 +113,10 @@ class Settings(BaseSettings):
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.cors_origins.split(",")]
     
+    @property
+    def replica_urls_list(self) -> List[str]:
+        return [url.strip() for url in self.supabase_replica_urls.split(",") if url.strip()]
+    
     @property
     def is_production(self) -> bool:
         return self.environment == "production"
@@ -13,6 +13,12 @@ MAX_QUERY_LENGTH = 100
 MAX_OUTPUT_LENGTH = 1000
 DEFAULT_CODE_TIMEOUT = 5  # seconds
 
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_DELAY_SECONDS = 0.05
+LATENCY_WINDOW_SIZE = 200
+REPLICA_HEALTH_TIMEOUT_SECONDS = 2
+READ_YOUR_WRITES_MAX_CALLERS = 10000
+
 DEFAULT_XP_REWARD = 10
 DEFAULT_LESSON_MINUTES = 15
 
@@ -22,14 +28,61 @@ MSG_NOT_FOUND = "Resource not found"
 MSG_CONFLICT = "Resource already exists"
 MSG_SERVER_ERROR = "Internal server error"
 
+CATALOG_SELECT = "*, modules(*, lessons(*))"
+CATALOG_REFRESH_SECONDS = 60
+# Change log entries kept for GET /courses/changes; older clients must resync
+CATALOG_CHANGE_LOG_SIZE = 1000
+# Ids the catalog looked up and did not find are not looked up again for this long
+CATALOG_MISS_TTL_SECONDS = 5
+CATALOG_MISS_CACHE_SIZE = 4096
+# Results per type returned by GET /search
+SEARCH_COURSE_LIMIT = 5
+SEARCH_LESSON_LIMIT = 10
+# Weight of a title match relative to a description match
+SEARCH_TITLE_WEIGHT = 3.0
+# Postgres search results, keyed by catalog ETag and normalized query
+SEARCH_CACHE_TTL_SECONDS = 60
+SEARCH_CACHE_MAX_SIZE = 1024
+# Titles returned by GET /search/suggest (default and maximum)
+SUGGEST_DEFAULT_LIMIT = 8
+SUGGEST_MAX_LIMIT = 20
+# How often the content pack exporter checks the catalog version
+CONTENT_PACK_POLL_SECONDS = 5
+
+# Browsers revalidate every time (cheap 304s); shared caches may serve for a minute
+CATALOG_CACHE_CONTROL = "public, max-age=0, s-maxage=60, stale-while-revalidate=300"
+ACHIEVEMENTS_CACHE_CONTROL = "private, max-age=0, must-revalidate"
+ACHIEVEMENTS_CACHE_TTL_SECONDS = 300
+
+# Bodies below this size are sent uncompressed
+COMPRESSION_MIN_BYTES = 1024
+# Snapshots are compressed when first requested after a change, while
+# clients wait: mid levels keep most of the size win at a fraction of the CPU
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+
 DEFAULT_PAGE_SIZE = 20
 MAX_PAGE_SIZE = 100
 
+# Course tree import/export
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+IMPORT_BATCH_SIZE = 200
+IMPORT_MAX_RECORDS = 5000
+# Budget of the cleanup that removes a half-written course; it runs after the
+# request's own deadline may already be spent
+COMPENSATION_TIMEOUT_SECONDS = 5.0
+
 ROLE_USER = "user"
 ROLE_ADMIN = "admin"
 ROLE_SUPER_ADMIN = "super_admin"
 ADMIN_ROLES = [ROLE_ADMIN, ROLE_SUPER_ADMIN]
 
+# Query metrics serialize one result in this many to estimate payload sizes
+QUERY_PAYLOAD_SAMPLE_EVERY = 20
+
+ROLE_CACHE_TTL_SECONDS = 60
+ROLE_CACHE_MAX_SIZE = 1024
+
 DIFFICULTY_BEGINNER = "beginner"
 DIFFICULTY_INTERMEDIATE = "intermediate"
 DIFFICULTY_ADVANCED = "advanced"
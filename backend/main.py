@@ -6,6 +6,7 @@ A FastAPI-based backend for an interactive learning platform.
 """
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 import uvicorn
@@ -13,7 +14,14 @@ import time
 import logging
 
 from config import settings
-from constants import API_VERSION, API_TITLE
+from constants import API_VERSION, API_TITLE, COMPRESSION_MIN_BYTES
+from utils.compression import EncodedETagMiddleware
+from services.resilience import request_deadline
+from services.query_metrics import track_request
+from services.replicas import replica_pool
+from services.catalog import course_catalog
+from services.search_index import search_index
+from services.content_pack import content_pack
 from routers import (
     auth_router,
     courses_router,
@@ -22,7 +30,8 @@ from routers import (
     progress_router,
     search_router,
     users_router,
-    achievements_router
+    achievements_router,
+    metrics_router
 )
 from routers.onboarding import router as onboarding_router
 logging.basicConfig(
@@ -36,9 +45,20 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     logger.info(f"Backend: {settings.backend_url}")
     logger.info(f"Frontend: {settings.cors_origins}")
+    if settings.replica_urls_list:
+        logger.info(f"Read replicas: {len(settings.replica_urls_list)}")
+    replica_pool.start_health_checks()
+    course_catalog.start()
+    if settings.search_mode == "memory":
+        search_index.start()
+    content_pack.start()
     
     yield
     
+    await content_pack.stop()
+    await search_index.stop()
+    await course_catalog.stop()
+    await replica_pool.stop_health_checks()
     logger.info(f"Shutting down {API_TITLE}...")
 
 
@@ -60,8 +80,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination cursors (utils.pagination) must be readable cross-origin
+    expose_headers=["X-Next-Cursor", "Link"],
 )
 
+# Per-request responses; cached catalog payloads arrive precompressed and pass through
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_BYTES, compresslevel=6)
+app.add_middleware(EncodedETagMiddleware)
+
 
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
@@ -72,6 +98,12 @@ async def add_process_time_header(request: Request, call_next):
     return response
 
 
+@app.middleware("http")
+async def apply_request_context(request: Request, call_next):
+    with request_deadline(settings.request_deadline_seconds), track_request(request.scope):
+        return await call_next(request)
+
+
 @app.middleware("http")
 async def add_security_headers(request: Request, call_next):
     response = await call_next(request)
@@ -128,6 +160,7 @@ app.include_router(progress_router)
 app.include_router(search_router)
 app.include_router(users_router)
 app.include_router(achievements_router)
+app.include_router(metrics_router)
 app.include_router(onboarding_router)
 
 
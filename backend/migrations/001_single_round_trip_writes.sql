@@ -0,0 +1,27 @@
+-- Single-round-trip write paths
+-- Apply in the Supabase SQL editor (or psql) before deploying the matching backend.
+
+-- POST /progress upserts on (user_id, lesson_id). Drop duplicates left behind by
+-- the old select-then-insert race, keeping the most recently updated row.
+DELETE FROM user_progress p
+USING user_progress newer
+WHERE p.user_id = newer.user_id
+  AND p.lesson_id = newer.lesson_id
+  AND (COALESCE(p.updated_at, p.created_at), p.id)
+    < (COALESCE(newer.updated_at, newer.created_at), newer.id);
+
+ALTER TABLE user_progress
+  ADD CONSTRAINT user_progress_user_lesson_key UNIQUE (user_id, lesson_id);
+
+-- GET /users/me and /users/{id}/profile: create the profile if missing and
+-- return it in the same call.
+CREATE OR REPLACE FUNCTION ensure_profile(p_id uuid, p_username text)
+RETURNS SETOF profiles
+LANGUAGE sql
+AS $$
+  INSERT INTO profiles (id, username, streak_days, onboarding_completed)
+  VALUES (p_id, p_username, 0, false)
+  ON CONFLICT (id) DO NOTHING;
+
+  SELECT * FROM profiles WHERE id = p_id;
+$$;
@@ -0,0 +1,47 @@
+-- Bulk reorder of a module's lessons / a course's modules
+-- Apply in the Supabase SQL editor (or psql) before deploying the matching backend.
+
+-- PUT /modules/{id}/lessons/order: one statement sets order_index from the
+-- position in p_lesson_ids, which must list every lesson of the module once.
+CREATE OR REPLACE FUNCTION reorder_lessons(p_module_id uuid, p_lesson_ids uuid[])
+RETURNS SETOF lessons
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF cardinality(p_lesson_ids) <> (SELECT count(DISTINCT id) FROM unnest(p_lesson_ids) AS id)
+     OR ARRAY(SELECT id FROM lessons WHERE module_id = p_module_id ORDER BY id)
+        <> ARRAY(SELECT id FROM unnest(p_lesson_ids) AS id ORDER BY id) THEN
+    RAISE EXCEPTION 'reorder_lessons: ids do not match the lessons of module %', p_module_id
+      USING ERRCODE = '22023';
+  END IF;
+
+  RETURN QUERY
+  UPDATE lessons l
+  SET order_index = o.position - 1, updated_at = now()
+  FROM unnest(p_lesson_ids) WITH ORDINALITY AS o(id, position)
+  WHERE l.id = o.id
+  RETURNING l.*;
+END;
+$$;
+
+-- PUT /courses/{id}/modules/order
+CREATE OR REPLACE FUNCTION reorder_modules(p_course_id uuid, p_module_ids uuid[])
+RETURNS SETOF modules
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF cardinality(p_module_ids) <> (SELECT count(DISTINCT id) FROM unnest(p_module_ids) AS id)
+     OR ARRAY(SELECT id FROM modules WHERE course_id = p_course_id ORDER BY id)
+        <> ARRAY(SELECT id FROM unnest(p_module_ids) AS id ORDER BY id) THEN
+    RAISE EXCEPTION 'reorder_modules: ids do not match the modules of course %', p_course_id
+      USING ERRCODE = '22023';
+  END IF;
+
+  RETURN QUERY
+  UPDATE modules m
+  SET order_index = o.position - 1
+  FROM unnest(p_module_ids) WITH ORDINALITY AS o(id, position)
+  WHERE m.id = o.id
+  RETURNING m.*;
+END;
+$$;
@@ -0,0 +1,92 @@
+-- Postgres full-text search for GET /search (SEARCH_MODE=postgres)
+-- Apply in the Supabase SQL editor (or psql) before switching the backend to it.
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() is only STABLE; index expressions need an IMMUTABLE function.
+-- Both index functions keep the search_path they were created with: since
+-- Postgres 17, CREATE INDEX, ANALYZE and VACUUM run with search_path set to
+-- pg_catalog, pg_temp and would not find unaccent or each other.
+CREATE OR REPLACE FUNCTION immutable_unaccent(p_text text)
+RETURNS text
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+SET search_path FROM CURRENT
+AS $$
+  SELECT unaccent('unaccent'::regdictionary, p_text);
+$$;
+
+-- Title terms rank above description terms. 'simple' keeps words as they are
+-- (no stemming), lowercased and without diacritics, like the in-process index.
+CREATE OR REPLACE FUNCTION content_search_vector(p_title text, p_description text)
+RETURNS tsvector
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+SET search_path FROM CURRENT
+AS $$
+  SELECT setweight(to_tsvector('simple', immutable_unaccent(coalesce(p_title, ''))), 'A')
+      || setweight(to_tsvector('simple', immutable_unaccent(coalesce(p_description, ''))), 'B');
+$$;
+
+-- Expression indexes rather than stored tsvector columns: a stored column
+-- would come back from every `select *` (the course catalog, clones, exports).
+CREATE INDEX IF NOT EXISTS courses_search_idx
+  ON courses USING gin (content_search_vector(title, description));
+CREATE INDEX IF NOT EXISTS lessons_search_idx
+  ON lessons USING gin (content_search_vector(title, description));
+
+-- Course and lesson hits with their course/module names in one round trip.
+-- Every word of p_query matches as a prefix. Courses come first, each type
+-- best rank first, ties in catalog order.
+CREATE OR REPLACE FUNCTION search_content(
+  p_query text,
+  p_course_limit integer DEFAULT 5,
+  p_lesson_limit integer DEFAULT 10
+)
+RETURNS TABLE (
+  type text,
+  id uuid,
+  title text,
+  description text,
+  course_name text,
+  module_name text,
+  rank real
+)
+LANGUAGE sql STABLE
+AS $$
+  WITH q AS (
+    SELECT to_tsquery('simple', string_agg(quote_literal(word) || ':*', ' & ')) AS query
+    FROM regexp_split_to_table(immutable_unaccent(lower(p_query)), '\W+') AS word
+    WHERE word <> ''
+  ),
+  course_hits AS (
+    SELECT 'course'::text AS type, c.id, c.title, c.description,
+           NULL::text AS course_name, NULL::text AS module_name,
+           ts_rank(content_search_vector(c.title, c.description), q.query) AS rank,
+           c.order_index AS course_order, 0 AS module_order, 0 AS lesson_order
+    FROM courses c, q
+    WHERE c.is_published
+      AND content_search_vector(c.title, c.description) @@ q.query
+    ORDER BY rank DESC, c.order_index
+    LIMIT p_course_limit
+  ),
+  lesson_hits AS (
+    SELECT 'lesson'::text, l.id, l.title, l.description, c.title, m.title,
+           ts_rank(content_search_vector(l.title, l.description), q.query) AS rank,
+           c.order_index, m.order_index, l.order_index
+    FROM lessons l
+    JOIN modules m ON m.id = l.module_id
+    JOIN courses c ON c.id = m.course_id, q
+    WHERE c.is_published
+      AND content_search_vector(l.title, l.description) @@ q.query
+    ORDER BY rank DESC, c.order_index, m.order_index, l.order_index
+    LIMIT p_lesson_limit
+  )
+  -- UNION ALL keeps no order of its own: sort the combined hits explicitly
+  SELECT hits.type, hits.id, hits.title, hits.description, hits.course_name, hits.module_name, hits.rank
+  FROM (
+    SELECT * FROM course_hits
+    UNION ALL
+    SELECT * FROM lesson_hits
+  ) hits
+  ORDER BY hits.type <> 'course', hits.rank DESC,
+           hits.course_order, hits.module_order, hits.lesson_order;
+$$;
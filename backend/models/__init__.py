@@ -13,15 +13,19 @@ __all__ = [
     "CourseBase", "CourseCreate", "CourseUpdate", "CourseResponse",
     "ModuleBase", "ModuleCreate", "ModuleUpdate", "ModuleResponse",
     "LessonBase", "LessonCreate", "LessonUpdate", "LessonResponse",
+    "CourseOutlineResponse", "ModuleOutlineResponse", "LessonOutlineResponse", "CourseViewResponse",
+    "CourseTreeCourse", "CourseTreeModule", "CourseTreeLesson", "CourseTreeRecord",
+    "ReorderRequest", "LessonNavigation", "NavigationCrumb", "LessonBatchItem",
+    "CatalogChange", "CatalogChanges", "CourseCloneRequest",
     "Difficulty", "Language", "LessonType",
-    "LessonContentBase", "TestCase", "ExerciseContent",
+    "LessonContentBase", "LessonContent", "TestCase", "ExerciseContent",
     "TheoryContent", "QuizOption", "QuizContent", "ProjectContent",
     
     # Progress models
     "ProgressBase", "ProgressCreate", "ProgressUpdate", "ProgressResponse",
-    "ProgressStatus",
+    "ProgressStatus", "CourseUnlocks",
     
     # Validation models
     "CodeValidationRequest", "CodeValidationResponse",
-    "SearchQuery", "SearchResult",
+    "SearchQuery", "SearchResult", "SearchSuggestion",
 ]
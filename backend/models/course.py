@@ -1,6 +1,16 @@
-from pydantic import BaseModel, Field, ConfigDict, AliasGenerator
+from pydantic import (
+    BaseModel,
+    Field,
+    ConfigDict,
+    AliasGenerator,
+    Discriminator,
+    Tag,
+    field_validator,
+    model_validator,
+)
 from pydantic.alias_generators import to_snake
-from typing import Optional, List, Literal, Any
+from typing import Annotated, Dict, Optional, List, Literal, Any, Union
+from collections.abc import Mapping
 from datetime import datetime
 
 
@@ -17,10 +27,15 @@ snake_case_config = ConfigDict(
 )
 
 class LessonContentBase(BaseModel):
+    # Keys the frontend sends beyond the declared ones are kept, not dropped
+    model_config = ConfigDict(extra="allow")
+    
     type: LessonType
 
 
 class TestCase(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    
     input: Optional[str] = ""
     expectedOutput: str
     description: Optional[str] = None
@@ -46,6 +61,8 @@ class TheoryContent(LessonContentBase):
 
 
 class QuizOption(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    
     text: str
     isCorrect: bool
 
@@ -65,6 +82,45 @@ class ProjectContent(LessonContentBase):
     hints: Optional[List[str]] = None
 
 
+def _content_tag(value: Any) -> str:
+    content_type = value.get("type") if isinstance(value, dict) else getattr(value, "type", None)
+    return "untyped" if content_type is None else content_type
+
+
+# Tagged on `type`, so validation goes straight to the matching model. Content
+# without a `type` only gets through when there is no lessonType to take it
+# from (LessonUpdate); the update handler then checks it against the stored type.
+LessonContent = Annotated[
+    Union[
+        Annotated[ExerciseContent, Tag("exercise")],
+        Annotated[TheoryContent, Tag("theory")],
+        Annotated[QuizContent, Tag("quiz")],
+        Annotated[ProjectContent, Tag("project")],
+        Annotated[Dict[str, Any], Tag("untyped")],
+    ],
+    Discriminator(_content_tag)
+]
+
+
+def _fill_content_type(data: Any) -> Any:
+    """Untagged content of a lesson payload takes its type from lessonType"""
+    if isinstance(data, dict):
+        content = data.get("content")
+        lesson_type = data.get("lessonType", data.get("lesson_type"))
+        if isinstance(content, dict) and "type" not in content and lesson_type:
+            data = {**data, "content": {**content, "type": lesson_type}}
+    return data
+
+
+def _check_content_type(model: Any) -> Any:
+    """Typed content must be of the lesson's type"""
+    if model.content is not None and model.lessonType is not None:
+        content_type = _content_tag(model.content)
+        if content_type != "untyped" and content_type != model.lessonType:
+            raise ValueError(f"content.type '{content_type}' does not match lessonType '{model.lessonType}'")
+    return model
+
+
 class LessonBase(BaseModel):
     model_config = snake_case_config
     
@@ -80,7 +136,10 @@ class LessonBase(BaseModel):
 
 class LessonCreate(LessonBase):
     module_id: str
-    content: ExerciseContent | TheoryContent | QuizContent | ProjectContent
+    content: LessonContent
+    
+    _fill_content_type = model_validator(mode="before")(_fill_content_type)
+    _check_content_type = model_validator(mode="after")(_check_content_type)
 
 
 class LessonUpdate(BaseModel):
@@ -89,12 +148,15 @@ class LessonUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     lessonType: Optional[LessonType] = None
-    content: Optional[Any] = None
+    content: Optional[LessonContent] = None
     language: Optional[Language] = None
     xpReward: Optional[int] = None
     orderIndex: Optional[int] = None
     isLocked: Optional[bool] = None
     estimatedMinutes: Optional[int] = None
+    
+    _fill_content_type = model_validator(mode="before")(_fill_content_type)
+    _check_content_type = model_validator(mode="after")(_check_content_type)
 
 
 class LessonResponse(BaseModel):
@@ -110,11 +172,49 @@ class LessonResponse(BaseModel):
     xpReward: int = Field(default=10, validation_alias='xp_reward')
     estimatedMinutes: Optional[int] = Field(default=15, validation_alias='estimated_minutes')
     isLocked: bool = Field(default=False, validation_alias='is_locked')
+    # Served as stored: rows written before content was tagged must stay readable
     content: Any
     created_at: datetime
     updated_at: Optional[datetime] = None
 
 
+class LessonBatchItem(BaseModel):
+    """Entry of GET /lessons?ids=...; `lesson` is null when the id does not exist"""
+    id: str
+    lesson: Optional[LessonResponse] = None
+
+
+class LessonOutlineResponse(BaseModel):
+    """Lesson entry of the course outline: everything but `content`"""
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    
+    id: str
+    module_id: str
+    title: str
+    lessonType: LessonType = Field(validation_alias='lesson_type')
+    language: Language
+    orderIndex: int = Field(default=0, validation_alias='order_index')
+    xpReward: int = Field(default=10, validation_alias='xp_reward')
+    estimatedMinutes: Optional[int] = Field(default=15, validation_alias='estimated_minutes')
+    isLocked: bool = Field(default=False, validation_alias='is_locked')
+
+
+class NavigationCrumb(BaseModel):
+    id: str
+    title: str
+
+
+class LessonNavigation(BaseModel):
+    """Where a lesson sits in its course; position is 1-based across all modules"""
+    lessonId: str
+    previousLessonId: Optional[str] = None
+    nextLessonId: Optional[str] = None
+    position: int
+    totalLessons: int
+    module: NavigationCrumb
+    course: NavigationCrumb
+
+
 # Module Models
 class ModuleBase(BaseModel):
     model_config = snake_case_config
@@ -151,6 +251,18 @@ class ModuleResponse(BaseModel):
     created_at: datetime
 
 
+class ModuleOutlineResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    
+    id: str
+    course_id: str
+    title: str
+    description: str
+    orderIndex: int = Field(validation_alias='order_index')
+    iconEmoji: Optional[str] = Field(default="📚", validation_alias='icon_emoji')
+    lessons: List[LessonOutlineResponse] = []
+
+
 class CourseBase(BaseModel):
     model_config = snake_case_config
     
@@ -198,3 +310,99 @@ class CourseResponse(BaseModel):
     orderIndex: Optional[int] = Field(default=0, validation_alias='order_index')
     modules: List[ModuleResponse] = []
     created_at: datetime
+
+
+class CourseOutlineResponse(BaseModel):
+    """Course tree for listings: modules and lesson headers, no lesson content"""
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    
+    id: str
+    title: str
+    description: str
+    difficulty: Difficulty
+    language: str
+    color: Optional[str] = "#3B82F6"
+    iconUrl: Optional[str] = Field(default=None, validation_alias='icon_url')
+    estimatedHours: Optional[int] = Field(default=10, validation_alias='estimated_hours')
+    isPublished: bool = Field(default=False, validation_alias='is_published')
+    orderIndex: Optional[int] = Field(default=0, validation_alias='order_index')
+    modules: List[ModuleOutlineResponse] = []
+
+
+def _course_view(value: Any) -> str:
+    if isinstance(value, Mapping):
+        return "full" if "created_at" in value else "outline"
+    return "outline" if isinstance(value, CourseOutlineResponse) else "full"
+
+
+# GET /courses and GET /courses/{id}: ?view=outline drops lesson content
+# (and timestamps), so the two shapes are told apart by `created_at`
+CourseViewResponse = Annotated[
+    Union[
+        Annotated[CourseResponse, Tag("full")],
+        Annotated[CourseOutlineResponse, Tag("outline")],
+    ],
+    Discriminator(_course_view)
+]
+
+
+# Bulk reorder: the complete new order of a module's lessons / a course's modules
+class ReorderRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1)
+    
+    @field_validator('ids')
+    def validate_ids(cls, v):
+        if len(set(v)) != len(v):
+            raise ValueError('Ids must be unique')
+        return v
+
+
+class CourseCloneRequest(BaseModel):
+    """Overrides for the copy; the clone is unpublished unless asked otherwise"""
+    model_config = snake_case_config
+    
+    title: Optional[str] = None
+    description: Optional[str] = None
+    isPublished: bool = False
+    orderIndex: Optional[int] = None
+
+
+# Course tree import/export: NDJSON, one record per line, in tree order
+# (the course, then each module followed by its lessons)
+class CourseTreeCourse(CourseBase):
+    kind: Literal["course"]
+
+
+class CourseTreeModule(ModuleBase):
+    kind: Literal["module"]
+
+
+class CourseTreeLesson(LessonBase):
+    kind: Literal["lesson"]
+    content: LessonContent
+    
+    _fill_content_type = model_validator(mode="before")(_fill_content_type)
+    _check_content_type = model_validator(mode="after")(_check_content_type)
+
+
+CourseTreeRecord = Annotated[
+    Union[CourseTreeCourse, CourseTreeModule, CourseTreeLesson],
+    Field(discriminator="kind")
+]
+
+
+# Catalog delta sync
+class CatalogChange(BaseModel):
+    version: str
+    entity: Literal["course", "module", "lesson"]
+    id: str
+    op: Literal["created", "updated", "deleted"]
+    # Serialized like the matching *Response model, without nested children
+    data: Optional[dict] = None
+
+
+class CatalogChanges(BaseModel):
+    # "<epoch>.<n>"; only meaningful to the process that issued it
+    version: str
+    resync: bool = False
+    changes: List[CatalogChange] = []
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 from datetime import datetime
 
 
@@ -35,3 +35,11 @@ class ProgressResponse(ProgressBase):
     
     class Config:
         from_attributes = True
+
+
+class CourseUnlocks(BaseModel):
+    """Lessons of a course the user can open, in course order"""
+    course_id: str
+    user_id: str
+    unlocked_lesson_ids: List[str]
+    next_lesson_id: Optional[str] = None
@@ -49,6 +49,12 @@ class SearchQuery(BaseModel):
         return v
 
 
+class SearchSuggestion(BaseModel):
+    type: Literal["course", "lesson"]
+    id: str
+    title: str
+
+
 class SearchResult(BaseModel):
     type: Literal["course", "lesson"]
     id: str
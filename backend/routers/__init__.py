@@ -7,6 +7,7 @@ from .progress import router as progress_router
 from .search import router as search_router
 from .users import router as users_router
 from .achievements import router as achievements_router
+from .metrics import router as metrics_router
 
 __all__ = [
     "auth_router",
@@ -17,5 +18,6 @@ __all__ = [
     "search_router",
     "users_router",
     "achievements_router",
+    "metrics_router",
 ]
 
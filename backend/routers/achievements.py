@@ -2,15 +2,28 @@
 Achievements router.
 Uses 'achievements' and 'user_achievements' tables from Supabase schema.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
 from typing import Optional, List
+from constants import ACHIEVEMENTS_CACHE_CONTROL, ACHIEVEMENTS_CACHE_TTL_SECONDS
+from services import run_query
 from supabase_client import get_admin_supabase
-from utils import get_access_token, handle_supabase_error
+from utils import (
+    get_access_token,
+    handle_supabase_error,
+    content_etag,
+    etag_matches,
+    not_modified,
+    set_cache_headers,
+)
+from utils.cache import TTLCache
 
 
 router = APIRouter(prefix="/achievements", tags=["Achievements"])
 
+# The achievement definitions change rarely; keep them with their ETag
+_achievements_cache = TTLCache(max_size=1, ttl_seconds=ACHIEVEMENTS_CACHE_TTL_SECONDS)
+
 
 class Achievement(BaseModel):
     id: str
@@ -36,16 +49,30 @@ class UnlockResponse(BaseModel):
 
 @router.get("", response_model=List[Achievement])
 async def get_all_achievements(
+    request: Request,
+    response: Response,
     token: str = Depends(get_access_token)
 ):
     try:
-        supabase = get_admin_supabase()
+        cached = _achievements_cache.get("all")
+        if cached is None:
+            supabase = get_admin_supabase()
+            
+            db_response = await run_query(
+                supabase.table("achievements")
+                .select("*"),
+                idempotent=True
+            )
+            
+            cached = (db_response.data, content_etag(db_response.data))
+            _achievements_cache.set("all", cached)
         
-        response = supabase.table("achievements") \
-            .select("*") \
-            .execute()
+        rows, etag = cached
+        if etag_matches(request, etag):
+            return not_modified(request, etag, ACHIEVEMENTS_CACHE_CONTROL)
         
-        return [Achievement(**ach) for ach in response.data]
+        set_cache_headers(response, etag, ACHIEVEMENTS_CACHE_CONTROL)
+        return [Achievement(**ach) for ach in rows]
     except Exception as e:
         handle_supabase_error(e, "Failed to fetch achievements")
 
@@ -58,10 +85,12 @@ async def get_user_achievements(
     try:
         supabase = get_admin_supabase()
         
-        response = supabase.table("user_achievements") \
-            .select("*, achievements(*)") \
-            .eq("user_id", user_id) \
-            .execute()
+        response = await run_query(
+            supabase.table("user_achievements")
+            .select("*, achievements(*)")
+            .eq("user_id", user_id),
+            idempotent=True
+        )
         
         achievements = []
         for ua in response.data:
@@ -90,10 +119,12 @@ async def check_and_unlock_achievements(
     try:
         supabase = get_admin_supabase()
         
-        profile_response = supabase.table("profiles") \
-            .select("total_xp, streak_days") \
-            .eq("id", user_id) \
-            .execute()
+        profile_response = await run_query(
+            supabase.table("profiles")
+            .select("total_xp, streak_days")
+            .eq("id", user_id),
+            idempotent=True
+        )
         
         if not profile_response.data:
             raise HTTPException(status_code=404, detail="Profile not found")
@@ -102,24 +133,30 @@ async def check_and_unlock_achievements(
         total_xp = profile.get("total_xp", 0) or 0
         streak_days = profile.get("streak_days", 0) or 0
         
-        progress_response = supabase.table("user_progress") \
-            .select("*", count="exact") \
-            .eq("user_id", user_id) \
-            .eq("status", "completed") \
-            .execute()
+        progress_response = await run_query(
+            supabase.table("user_progress")
+            .select("*", count="exact")
+            .eq("user_id", user_id)
+            .eq("status", "completed"),
+            idempotent=True
+        )
         
         lessons_completed = progress_response.count or 0
         
-        unlocked_response = supabase.table("user_achievements") \
-            .select("achievement_id") \
-            .eq("user_id", user_id) \
-            .execute()
+        unlocked_response = await run_query(
+            supabase.table("user_achievements")
+            .select("achievement_id")
+            .eq("user_id", user_id),
+            idempotent=True
+        )
         
         unlocked_ids = {ua["achievement_id"] for ua in unlocked_response.data}
         
-        all_achievements = supabase.table("achievements") \
-            .select("*") \
-            .execute()
+        all_achievements = await run_query(
+            supabase.table("achievements")
+            .select("*"),
+            idempotent=True
+        )
         
         newly_unlocked = []
         
@@ -140,10 +177,10 @@ async def check_and_unlock_achievements(
                 should_unlock = True
             
             if should_unlock:
-                supabase.table("user_achievements").insert({
+                await run_query(supabase.table("user_achievements").insert({
                     "user_id": user_id,
                     "achievement_id": ach["id"]
-                }).execute()
+                }))
                 
                 newly_unlocked.append(Achievement(
                     id=ach["id"],
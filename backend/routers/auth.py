@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
 from models import UserLogin, RegisterRequest, AuthResponse
 from supabase_client import get_supabase
-from utils import create_auth_response, require_admin, get_access_token
+from constants import ADMIN_ROLES
+from utils import create_auth_response, require_admin, get_access_token, get_user_role
 import logging
 
 logger = logging.getLogger(__name__)
@@ -93,11 +94,6 @@ async def google_sign_in():
 
 @router.get("/check_admin")
 async def check_is_admin(token: str = Depends(get_access_token)):
-    from supabase_client import get_supabase
-    from constants import ADMIN_ROLES
-    import logging
-    
-    logger = logging.getLogger(__name__)
     supabase = get_supabase()
     
     try:
@@ -105,16 +101,10 @@ async def check_is_admin(token: str = Depends(get_access_token)):
         if not user_response or not user_response.user:
             return {"isAdmin": False}
         
-        user_id = user_response.user.id
-        profile_response = supabase.table("profiles")\
-            .select("role")\
-            .eq("id", user_id)\
-            .execute()
-        
-        if not profile_response.data:
+        role = await get_user_role(supabase, user_response.user.id)
+        if role is None:
             return {"isAdmin": False}
         
-        role = profile_response.data[0].get("role", "")
         return {"isAdmin": role in ADMIN_ROLES}
         
     except Exception as e:
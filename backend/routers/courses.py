@@ -1,44 +1,196 @@
 """Course management routes"""
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Optional
-from models import CourseCreate, CourseUpdate, CourseResponse
-from supabase_client import get_supabase, get_admin_supabase
-from utils import get_access_token, require_admin, handle_supabase_error
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from typing import List, Literal, Optional
+from models import (
+    CourseCreate,
+    CourseUpdate,
+    CourseResponse,
+    CourseOutlineResponse,
+    CourseViewResponse,
+    ModuleResponse,
+    LessonResponse,
+    ReorderRequest,
+    CatalogChanges,
+    CourseCloneRequest,
+)
+from constants import (
+    CATALOG_CACHE_CONTROL,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NDJSON_MEDIA_TYPE,
+)
+from services import (
+    run_query,
+    mark_write,
+    course_catalog,
+    PUBLISHED_SNAPSHOT,
+    parse_course_tree,
+    write_course_tree,
+    export_course_tree,
+    clone_course_tree,
+)
+from supabase_client import get_admin_supabase
+from utils import (
+    get_access_token,
+    require_admin,
+    handle_supabase_error,
+    combine_etags,
+    decode_cursor,
+    encoded_response,
+    etag_matches,
+    not_modified,
+    set_cache_headers,
+    set_next_page,
+)
 
 
 router = APIRouter(prefix="/courses", tags=["Courses"])
 
+CourseView = Literal["full", "outline"]
+VIEW_QUERY = Query(
+    "full",
+    description="'outline' returns modules and lesson headers without lesson content"
+)
 
-@router.get("", response_model=List[CourseResponse])
-async def get_all_courses():
-    """Get all published courses with modules and lessons - public endpoint"""
+_course_adapters = {
+    "full": TypeAdapter(CourseResponse),
+    "outline": TypeAdapter(CourseOutlineResponse),
+}
+
+
+def _course_snapshot(course: dict, view: CourseView) -> tuple:
+    """Catalog snapshot arguments for one course: key, view, etag and renderer"""
+    adapter = _course_adapters[view]
+    return (
+        course["id"],
+        view,
+        course_catalog.cached_course_etag(course["id"]),
+        lambda: adapter.dump_json(adapter.validate_python(course)),
+    )
+
+
+def _render_course(course: dict, view: CourseView) -> bytes:
+    """JSON for one course, validated and serialized once per course version"""
+    return course_catalog.snapshot(*_course_snapshot(course, view))
+
+
+@router.get("", response_model=List[CourseViewResponse])
+async def get_all_courses(
+    request: Request,
+    view: CourseView = VIEW_QUERY,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page")
+):
+    """
+    Get all published courses with modules and lessons - public endpoint.
+    Paginated by (order_index, id) when `limit` or `cursor` is given.
+    """
     try:
-        supabase = get_supabase()
-        response = supabase.table("courses") \
-            .select("*, modules(*, lessons(*))") \
-            .eq("is_published", True) \
-            .order("order_index") \
-            .execute()
-        
-        return response.data
+        paginated = limit is not None or cursor is not None
+        after = decode_cursor(cursor) if cursor else None
+        
+        etag = await course_catalog.published_etag()
+        if view == "outline" or paginated:
+            etag = combine_etags(etag, view, cursor or "", str(limit or ""))
+        
+        if etag_matches(request, etag):
+            return not_modified(request, etag, CATALOG_CACHE_CONTROL)
+        
+        if paginated:
+            courses, next_key = await course_catalog.get_published_page(
+                after, limit or DEFAULT_PAGE_SIZE
+            )
+        else:
+            courses, next_key = await course_catalog.get_published_courses(), None
+        
+        def render() -> bytes:
+            return b"[" + b",".join(_render_course(course, view) for course in courses) + b"]"
+        
+        if paginated:
+            # Pages are spliced from per-course snapshots and not kept: clients
+            # pick cursors and limits, so caching every page would grow unbounded.
+            # GZipMiddleware compresses them.
+            response = Response(content=render(), media_type="application/json")
+            set_cache_headers(response, etag, CATALOG_CACHE_CONTROL)
+            set_next_page(request, response, next_key)
+            return response
+        
+        # The whole listing is kept per view
+        snapshot = (PUBLISHED_SNAPSHOT, f"{view}::", etag, render)
+        return await encoded_response(
+            request,
+            course_catalog.snapshot(*snapshot),
+            lambda encoding: course_catalog.encoded_snapshot(*snapshot, encoding),
+            etag,
+            CATALOG_CACHE_CONTROL
+        )
     except Exception as e:
         handle_supabase_error(e, "Failed to fetch courses")
 
 
-@router.get("/{course_id}", response_model=CourseResponse)
-async def get_course(course_id: str):
+_change_models = {
+    "course": (CourseResponse, "modules"),
+    "module": (ModuleResponse, "lessons"),
+    "lesson": (LessonResponse, None),
+}
+
+
+@router.get("/changes", response_model=CatalogChanges)
+async def get_catalog_changes(
+    since: str = Query(..., max_length=64, description="Catalog version token the client has")
+):
+    """
+    Published catalog changes after `since` - public endpoint.
+    `resync: true` means the client must reload GET /courses and continue from `version`.
+    """
+    try:
+        version, changes = await course_catalog.get_changes(since)
+        
+        if changes is None:
+            return {"version": version, "resync": True, "changes": []}
+        
+        result = []
+        for change in changes:
+            data = change["data"]
+            if data is not None:
+                model, children = _change_models[change["entity"]]
+                data = model.model_validate(data).model_dump(mode="json", exclude={children} if children else None)
+            result.append({**change, "data": data})
+        return {"version": version, "changes": result}
+    except Exception as e:
+        handle_supabase_error(e, "Failed to fetch catalog changes")
+
+
+@router.get("/{course_id}", response_model=CourseViewResponse)
+async def get_course(
+    course_id: str,
+    request: Request,
+    view: CourseView = VIEW_QUERY
+):
     """Get single course with modules and lessons - public endpoint"""
     try:
-        supabase = get_supabase()
-        response = supabase.table("courses") \
-            .select("*, modules(*, lessons(*))") \
-            .eq("id", course_id) \
-            .execute()
+        etag = await course_catalog.course_etag(course_id)
         
-        if not response.data:
+        if etag is None:
             raise HTTPException(status_code=404, detail="Course not found")
         
-        return response.data[0]
+        if view == "outline":
+            etag = combine_etags(etag, view)
+        
+        if etag_matches(request, etag):
+            return not_modified(request, etag, CATALOG_CACHE_CONTROL)
+        
+        course = await course_catalog.get_course(course_id)
+        snapshot = _course_snapshot(course, view)
+        return await encoded_response(
+            request,
+            course_catalog.snapshot(*snapshot),
+            lambda encoding: course_catalog.encoded_snapshot(*snapshot, encoding),
+            etag,
+            CATALOG_CACHE_CONTROL
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -48,18 +200,21 @@ async def get_course(course_id: str):
 @router.post("", response_model=CourseResponse)
 async def create_course(
     course: CourseCreate,
-    user = Depends(require_admin)
+    user = Depends(require_admin),
+    token: str = Depends(get_access_token)
 ):
     """Create new course (admin only)"""
     try:
         supabase = get_admin_supabase()
         course_data = course.model_dump(by_alias=True)
-        response = supabase.table("courses").insert(course_data).execute()
+        response = await run_query(supabase.table("courses").insert(course_data))
         
         if not response.data:
             raise HTTPException(status_code=500, detail="Failed to create course")
         
         result = response.data[0]
+        mark_write(token)
+        await course_catalog.invalidate_course(result["id"])
         result["modules"] = []
         return result
     except HTTPException:
@@ -72,27 +227,25 @@ async def create_course(
 async def update_course(
     course_id: str,
     updates: CourseUpdate,
-    user = Depends(require_admin)
+    user = Depends(require_admin),
+    token: str = Depends(get_access_token)
 ):
     """Update course (admin only)"""
     try:
         supabase = get_admin_supabase()
         raw_data = {k: v for k, v in updates.model_dump(by_alias=True).items() if v is not None}
         
-        response = supabase.table("courses") \
-            .update(raw_data) \
-            .eq("id", course_id) \
-            .execute()
+        response = await run_query(
+            supabase.table("courses")
+            .update(raw_data)
+            .eq("id", course_id)
+        )
         
         if not response.data:
             raise HTTPException(status_code=404, detail="Course not found")
         
-        full_response = supabase.table("courses") \
-            .select("*, modules(*, lessons(*))") \
-            .eq("id", course_id) \
-            .execute()
-        
-        return full_response.data[0]
+        mark_write(token)
+        return await course_catalog.invalidate_course(course_id)
     except HTTPException:
         raise
     except Exception as e:
@@ -102,12 +255,116 @@ async def update_course(
 @router.delete("/{course_id}")
 async def delete_course(
     course_id: str,
-    user = Depends(require_admin)
+    user = Depends(require_admin),
+    token: str = Depends(get_access_token)
 ):
     """Delete course (admin only)"""
     try:
         supabase = get_admin_supabase()
-        supabase.table("courses").delete().eq("id", course_id).execute()
+        await run_query(
+            supabase.table("courses")
+            .delete()
+            .eq("id", course_id)
+        )
+        mark_write(token)
+        await course_catalog.invalidate_course(course_id)
         return {"success": True, "message": "Course deleted"}
     except Exception as e:
         handle_supabase_error(e, "Failed to delete course")
+
+
+@router.put("/{course_id}/modules/order", response_model=CourseResponse)
+async def reorder_modules(
+    course_id: str,
+    order: ReorderRequest,
+    user = Depends(require_admin),
+    token: str = Depends(get_access_token)
+):
+    """Set order_index of every module in the course in one write (admin only)"""
+    try:
+        # The RPC checks that the ids are exactly the course's modules (400 otherwise)
+        supabase = get_admin_supabase()
+        await run_query(
+            supabase.rpc("reorder_modules", {"p_course_id": course_id, "p_module_ids": order.ids})
+        )
+        mark_write(token)
+        
+        course = await course_catalog.invalidate_course(course_id)
+        if course is None:
+            raise HTTPException(status_code=404, detail="Course not found")
+        return course
+    except HTTPException:
+        raise
+    except Exception as e:
+        handle_supabase_error(e, "Failed to reorder modules")
+
+
+@router.post("/{course_id}/clone", response_model=CourseResponse)
+async def clone_course(
+    course_id: str,
+    options: CourseCloneRequest = CourseCloneRequest(),
+    user = Depends(require_admin),
+    token: str = Depends(get_access_token)
+):
+    """Deep-copy a course with its modules and lessons (admin only)"""
+    try:
+        # Copy from the primary, not a cached tree that may miss recent edits
+        course = await course_catalog.invalidate_course(course_id)
+        
+        if course is None:
+            raise HTTPException(status_code=404, detail="Course not found")
+        
+        overrides = {k: v for k, v in options.model_dump(by_alias=True).items() if v is not None}
+        overrides.setdefault("title", f"{course['title']} (kopia)")
+        
+        new_course_id = await write_course_tree(clone_course_tree(course, overrides))
+        mark_write(token)
+        return await course_catalog.invalidate_course(new_course_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        handle_supabase_error(e, "Failed to clone course")
+
+
+@router.post("/import", response_model=CourseResponse)
+async def import_course(
+    request: Request,
+    user = Depends(require_admin),
+    token: str = Depends(get_access_token)
+):
+    """
+    Create a whole course tree from an NDJSON body (admin only).
+    Same format as GET /courses/{course_id}/export.
+    """
+    try:
+        tree = await parse_course_tree(request.stream())
+        course_id = await write_course_tree(tree)
+        mark_write(token)
+        return await course_catalog.invalidate_course(course_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        handle_supabase_error(e, "Failed to import course")
+
+
+@router.get("/{course_id}/export")
+async def export_course(
+    course_id: str,
+    user = Depends(require_admin)
+):
+    """Stream a course with its modules and lessons as NDJSON (admin only)"""
+    try:
+        course = await course_catalog.get_course(course_id)
+        
+        if course is None:
+            raise HTTPException(status_code=404, detail="Course not found")
+        
+        return StreamingResponse(
+            export_course_tree(course),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers={"Content-Disposition": f'attachment; filename="course-{course_id}.ndjson"'}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        handle_supabase_error(e, "Failed to export course")
@@ -1,46 +1,206 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Optional
-from models import LessonCreate, LessonUpdate, LessonResponse
-from supabase_client import get_supabase, get_admin_supabase
-from utils import get_access_token, require_admin, handle_supabase_error
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter, ValidationError
+from typing import List
+import json
+import uuid
+from constants import CATALOG_CACHE_CONTROL, MAX_PAGE_SIZE
+from models import LessonCreate, LessonUpdate, LessonResponse, LessonNavigation, LessonBatchItem
+from services import run_query, get_read_supabase, mark_write, course_catalog
+from supabase_client import get_admin_supabase
+from utils import (
+    get_access_token,
+    require_admin,
+    handle_supabase_error,
+    combine_etags,
+    content_etag,
+    encoded_response,
+    etag_matches,
+    not_modified,
+    set_cache_headers,
+)
 
 
 router = APIRouter(prefix="/lessons", tags=["Lessons"])
 
 
+_lesson_adapter = TypeAdapter(LessonResponse)
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _serialize_lesson(lesson: dict) -> bytes:
+    return _lesson_adapter.dump_json(_lesson_adapter.validate_python(lesson))
+
+
+def _with_lesson_type(updates: LessonUpdate, lesson_type: str) -> LessonUpdate:
+    """Validates the content of an update without lessonType against the stored lesson type"""
+    content = updates.content if isinstance(updates.content, dict) else updates.content.model_dump()
+    try:
+        checked = LessonUpdate.model_validate({"content": content, "lessonType": lesson_type})
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=[
+            {**error, "loc": ["body", *error["loc"]]}
+            for error in e.errors(include_url=False, include_context=False)
+        ])
+    return updates.model_copy(update={"content": checked.content})
+
+
+def _lesson_snapshot(lesson: dict) -> tuple:
+    """Catalog snapshot arguments for a cached lesson: key, view, etag and renderer"""
+    return (
+        lesson["id"],
+        "full",
+        course_catalog.lesson_etag(lesson["id"]),
+        lambda: _serialize_lesson(lesson),
+    )
+
+
+def _render_lesson(lesson: dict) -> bytes:
+    """JSON for a cached lesson, validated and serialized once per lesson version"""
+    return course_catalog.snapshot(*_lesson_snapshot(lesson))
+
+
+@router.get("", response_model=List[LessonBatchItem])
+async def get_lessons_by_ids(
+    ids: str = Query(..., description=f"Comma-separated lesson ids, at most {MAX_PAGE_SIZE}")
+):
+    """
+    Get several lessons in one request - public endpoint. Entries follow the
+    order of `ids`; unknown ids come back with `lesson: null`.
+    """
+    try:
+        lesson_ids = [lesson_id.strip() for lesson_id in ids.split(",") if lesson_id.strip()]
+        
+        if not lesson_ids:
+            raise HTTPException(status_code=400, detail="No lesson ids given")
+        if len(lesson_ids) > MAX_PAGE_SIZE:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_PAGE_SIZE} lesson ids per request")
+        
+        bodies = {}
+        for lesson_id in lesson_ids:
+            lesson = await course_catalog.get_lesson(lesson_id)
+            if lesson is not None:
+                bodies[lesson_id] = _render_lesson(lesson)
+        
+        # Lessons outside the cached catalog: one query for all of them. Ids that
+        # are not UUIDs cannot exist and would make Postgres reject the whole query.
+        missing = [
+            lesson_id for lesson_id in dict.fromkeys(lesson_ids)
+            if lesson_id not in bodies and _is_uuid(lesson_id)
+        ]
+        if missing:
+            supabase = get_read_supabase()
+            db_response = await run_query(
+                supabase.table("lessons")
+                .select("*")
+                .in_("id", missing),
+                idempotent=True
+            )
+            for lesson in db_response.data:
+                bodies[lesson["id"]] = _serialize_lesson(lesson)
+        
+        items = [
+            b'{"id":' + json.dumps(lesson_id, ensure_ascii=False).encode()
+            + b',"lesson":' + bodies.get(lesson_id, b"null") + b"}"
+            for lesson_id in lesson_ids
+        ]
+        return Response(content=b"[" + b",".join(items) + b"]", media_type="application/json")
+    except HTTPException:
+        raise
+    except Exception as e:
+        handle_supabase_error(e, "Failed to fetch lessons")
+
+
 @router.get("/{lesson_id}", response_model=LessonResponse)
-async def get_lesson_by_id(lesson_id: str):
+async def get_lesson_by_id(lesson_id: str, request: Request, response: Response):
     """Get single lesson by ID - public endpoint"""
     try:
-        supabase = get_supabase()
-        response = supabase.table("lessons") \
-            .select("*") \
-            .eq("id", lesson_id) \
-            .execute()
+        lesson = await course_catalog.get_lesson(lesson_id)
+        cached = lesson is not None
         
-        if not response.data:
-            raise HTTPException(status_code=404, detail=f"Lesson {lesson_id} not found")
+        if cached:
+            etag = course_catalog.lesson_etag(lesson_id)
+        else:
+            # Not part of any cached course (e.g. created on another worker)
+            supabase = get_read_supabase()
+            db_response = await run_query(
+                supabase.table("lessons")
+                .select("*")
+                .eq("id", lesson_id),
+                idempotent=True
+            )
+            
+            if not db_response.data:
+                raise HTTPException(status_code=404, detail=f"Lesson {lesson_id} not found")
+            
+            lesson = db_response.data[0]
+            etag = content_etag(lesson)
         
-        return response.data[0]
+        if etag_matches(request, etag):
+            return not_modified(request, etag, CATALOG_CACHE_CONTROL)
+        
+        if cached:
+            snapshot = _lesson_snapshot(lesson)
+            return await encoded_response(
+                request,
+                course_catalog.snapshot(*snapshot),
+                lambda encoding: course_catalog.encoded_snapshot(*snapshot, encoding),
+                etag,
+                CATALOG_CACHE_CONTROL
+            )
+        
+        set_cache_headers(response, etag, CATALOG_CACHE_CONTROL)
+        return lesson
     except HTTPException:
         raise
     except Exception as e:
         handle_supabase_error(e, "Failed to fetch lesson")
 
 
+@router.get("/{lesson_id}/navigation", response_model=LessonNavigation)
+async def get_lesson_navigation(lesson_id: str, request: Request, response: Response):
+    """Previous/next lesson, position and breadcrumb - public endpoint"""
+    try:
+        navigation = await course_catalog.get_navigation(lesson_id)
+        
+        if navigation is None:
+            raise HTTPException(status_code=404, detail=f"Lesson {lesson_id} not found")
+        
+        course_etag = course_catalog.cached_course_etag(navigation["course"]["id"])
+        etag = combine_etags(course_etag, "navigation", lesson_id)
+        if etag_matches(request, etag):
+            return not_modified(request, etag, CATALOG_CACHE_CONTROL)
+        
+        set_cache_headers(response, etag, CATALOG_CACHE_CONTROL)
+        return navigation
+    except HTTPException:
+        raise
+    except Exception as e:
+        handle_supabase_error(e, "Failed to fetch lesson navigation")
+
+
 @router.post("", response_model=LessonResponse)
 async def create_lesson(
     lesson: LessonCreate,
-    user = Depends(require_admin)
+    user = Depends(require_admin),
+    token: str = Depends(get_access_token)
 ):
     try:
         supabase = get_admin_supabase()
         lesson_data = lesson.model_dump(by_alias=True)
-        response = supabase.table("lessons").insert(lesson_data).execute()
+        response = await run_query(supabase.table("lessons").insert(lesson_data))
         
         if not response.data:
             raise HTTPException(status_code=500, detail="Failed to create lesson")
         
+        mark_write(token)
+        await course_catalog.invalidate_module(lesson.module_id)
         return response.data[0]
     except HTTPException:
         raise
@@ -52,20 +212,35 @@ async def create_lesson(
 async def update_lesson(
     lesson_id: str,
     updates: LessonUpdate,
-    user = Depends(require_admin)
+    user = Depends(require_admin),
+    token: str = Depends(get_access_token)
 ):
     try:
         supabase = get_admin_supabase()
+        if updates.content is not None and updates.lessonType is None:
+            stored = await run_query(
+                supabase.table("lessons")
+                .select("lesson_type")
+                .eq("id", lesson_id),
+                idempotent=True
+            )
+            if not stored.data:
+                raise HTTPException(status_code=404, detail="Lesson not found")
+            updates = _with_lesson_type(updates, stored.data[0]["lesson_type"])
+
         raw_data = {k: v for k, v in updates.model_dump(by_alias=True).items() if v is not None}
         
-        response = supabase.table("lessons") \
-            .update(raw_data) \
-            .eq("id", lesson_id) \
-            .execute()
+        response = await run_query(
+            supabase.table("lessons")
+            .update(raw_data)
+            .eq("id", lesson_id)
+        )
         
         if not response.data:
             raise HTTPException(status_code=404, detail="Lesson not found")
         
+        mark_write(token)
+        await course_catalog.invalidate_module(response.data[0]["module_id"])
         return response.data[0]
     except HTTPException:
         raise
@@ -76,11 +251,19 @@ async def update_lesson(
 @router.delete("/{lesson_id}")
 async def delete_lesson(
     lesson_id: str,
-    user = Depends(require_admin)
+    user = Depends(require_admin),
+    token: str = Depends(get_access_token)
 ):
     try:
         supabase = get_admin_supabase()
-        supabase.table("lessons").delete().eq("id", lesson_id).execute()
+        response = await run_query(
+            supabase.table("lessons")
+            .delete()
+            .eq("id", lesson_id)
+        )
+        mark_write(token)
+        for lesson in response.data or []:
+            await course_catalog.invalidate_module(lesson["module_id"])
         return {"success": True, "message": "Lesson deleted"}
     except Exception as e:
         handle_supabase_error(e, "Failed to delete lesson")
@@ -0,0 +1,20 @@
+"""Data-layer metrics for operators (admin only)"""
+from fastapi import APIRouter, Depends
+from typing import Any, Dict, List
+from services.query_metrics import get_query_stats, reset_query_stats
+from utils import require_admin
+
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/queries")
+async def get_query_metrics(user = Depends(require_admin)) -> List[Dict[str, Any]]:
+    """Per (table, operation, route) query aggregates, most expensive first"""
+    return get_query_stats()
+
+
+@router.delete("/queries")
+async def reset_query_metrics(user = Depends(require_admin)):
+    reset_query_stats()
+    return {"success": True, "message": "Query metrics reset"}
@@ -1,8 +1,9 @@
 """Module management routes"""
 from fastapi import APIRouter, Depends, HTTPException
-from models import ModuleCreate, ModuleUpdate, ModuleResponse
+from models import ModuleCreate, ModuleUpdate, ModuleResponse, ReorderRequest
+from services import run_query, mark_write, course_catalog
 from supabase_client import get_admin_supabase
-from utils import require_admin, handle_supabase_error
+from utils import get_access_token, require_admin, handle_supabase_error
 
 
 router = APIRouter(prefix="/modules", tags=["Modules"])
@@ -11,17 +12,20 @@ router = APIRouter(prefix="/modules", tags=["Modules"])
 @router.post("", response_model=ModuleResponse)
 async def create_module(
     module: ModuleCreate,
-    user = Depends(require_admin)
+    user = Depends(require_admin),
+    token: str = Depends(get_access_token)
 ):
     try:
         supabase = get_admin_supabase()
         module_data = module.model_dump(by_alias=True)
-        response = supabase.table("modules").insert(module_data).execute()
+        response = await run_query(supabase.table("modules").insert(module_data))
         
         if not response.data:
             raise HTTPException(status_code=500, detail="Failed to create module")
         
         result = response.data[0]
+        mark_write(token)
+        await course_catalog.invalidate_course(result["course_id"])
         result["lessons"] = []
         return result
     except HTTPException:
@@ -34,26 +38,26 @@ async def create_module(
 async def update_module(
     module_id: str,
     updates: ModuleUpdate,
-    user = Depends(require_admin)
+    user = Depends(require_admin),
+    token: str = Depends(get_access_token)
 ):
     try:
         supabase = get_admin_supabase()
         raw_data = {k: v for k, v in updates.model_dump(by_alias=True).items() if v is not None}
         
-        response = supabase.table("modules") \
-            .update(raw_data) \
-            .eq("id", module_id) \
-            .execute()
+        response = await run_query(
+            supabase.table("modules")
+            .update(raw_data)
+            .eq("id", module_id)
+        )
         
         if not response.data:
             raise HTTPException(status_code=404, detail="Module not found")
         
-        full_response = supabase.table("modules") \
-            .select("*, lessons(*)") \
-            .eq("id", module_id) \
-            .execute()
+        mark_write(token)
+        await course_catalog.invalidate_course(response.data[0]["course_id"])
         
-        return full_response.data[0]
+        return await course_catalog.get_module(module_id)
     except HTTPException:
         raise
     except Exception as e:
@@ -63,11 +67,46 @@ async def update_module(
 @router.delete("/{module_id}")
 async def delete_module(
     module_id: str,
-    user = Depends(require_admin)
+    user = Depends(require_admin),
+    token: str = Depends(get_access_token)
 ):
     try:
         supabase = get_admin_supabase()
-        supabase.table("modules").delete().eq("id", module_id).execute()
+        response = await run_query(
+            supabase.table("modules")
+            .delete()
+            .eq("id", module_id)
+        )
+        mark_write(token)
+        for module in response.data or []:
+            await course_catalog.invalidate_course(module["course_id"])
         return {"success": True, "message": "Module deleted"}
     except Exception as e:
         handle_supabase_error(e, "Failed to delete module")
+
+
+@router.put("/{module_id}/lessons/order", response_model=ModuleResponse)
+async def reorder_lessons(
+    module_id: str,
+    order: ReorderRequest,
+    user = Depends(require_admin),
+    token: str = Depends(get_access_token)
+):
+    """Set order_index of every lesson in the module in one write (admin only)"""
+    try:
+        # The RPC checks that the ids are exactly the module's lessons (400 otherwise)
+        supabase = get_admin_supabase()
+        await run_query(
+            supabase.rpc("reorder_lessons", {"p_module_id": module_id, "p_lesson_ids": order.ids})
+        )
+        mark_write(token)
+        await course_catalog.invalidate_module(module_id)
+        
+        module = await course_catalog.get_module(module_id)
+        if module is None:
+            raise HTTPException(status_code=404, detail="Module not found")
+        return module
+    except HTTPException:
+        raise
+    except Exception as e:
+        handle_supabase_error(e, "Failed to reorder lessons")
@@ -2,6 +2,7 @@ from typing import Any, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from services import run_query, mark_write
 from supabase_client import get_admin_supabase
 from utils import get_access_token, handle_supabase_error
 
@@ -129,12 +130,15 @@ async def submit_onboarding(
 
         user_id = user_response.user.id
 
-        supabase.table("profiles").update(
-            {
-                "learning_path": answers.interest,
-                "experience_level": answers.experience,
-            }
-        ).eq("id", user_id).execute()
+        await run_query(
+            supabase.table("profiles").update(
+                {
+                    "learning_path": answers.interest,
+                    "experience_level": answers.experience,
+                }
+            ).eq("id", user_id)
+        )
+        mark_write(token)
 
         recommendation = get_course_recommendation(answers.interest, answers.experience)
 
@@ -153,11 +157,14 @@ async def complete_onboarding(token: str = Depends(get_access_token)):
 
         user_id = user_response.user.id
 
-        supabase.table("profiles").update(
-            {
-                "onboarding_completed": True,
-            }
-        ).eq("id", user_id).execute()
+        await run_query(
+            supabase.table("profiles").update(
+                {
+                    "onboarding_completed": True,
+                }
+            ).eq("id", user_id)
+        )
+        mark_write(token)
 
         return {"message": "Onboarding completed successfully"}
 
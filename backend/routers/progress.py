@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List
-from models import ProgressCreate, ProgressResponse
-from supabase_client import get_supabase, get_admin_supabase
+from typing import Iterable, List, Set, Tuple
+from models import CourseUnlocks, ProgressCreate, ProgressResponse
+from services import course_catalog, run_query, get_read_supabase, mark_write
+from supabase_client import get_admin_supabase
 from utils import get_access_token, handle_supabase_error
 
 
@@ -14,17 +15,68 @@ async def get_user_progress(
     token: str = Depends(get_access_token)
 ):
     try:
-        supabase = get_admin_supabase()
-        response = supabase.table("user_progress") \
-            .select("*") \
-            .eq("user_id", user_id) \
-            .execute()
+        supabase = get_read_supabase(admin=True, caller=token)
+        response = await run_query(
+            supabase.table("user_progress")
+            .select("*")
+            .eq("user_id", user_id),
+            idempotent=True
+        )
         
         return response.data
     except Exception as e:
         handle_supabase_error(e, "Failed to fetch progress")
 
 
+def _unlocked_lessons(order: Iterable[Tuple[str, bool]], completed: Set[str]) -> List[str]:
+    """
+    A lesson is open when it is not flagged as locked, is the first lesson of
+    the course, or the lesson before it is completed.
+    """
+    unlocked = []
+    previous_completed = True
+    for lesson_id, is_locked in order:
+        if not is_locked or previous_completed or lesson_id in completed:
+            unlocked.append(lesson_id)
+        previous_completed = lesson_id in completed
+    return unlocked
+
+
+@router.get("/users/{user_id}/courses/{course_id}/unlocked", response_model=CourseUnlocks)
+async def get_unlocked_lessons(
+    user_id: str,
+    course_id: str,
+    token: str = Depends(get_access_token)
+):
+    """Lesson lock state resolved from the cached course order and the user's completed lessons"""
+    try:
+        order = await course_catalog.get_lesson_order(course_id)
+        if order is None:
+            raise HTTPException(status_code=404, detail="Course not found")
+
+        supabase = get_read_supabase(admin=True, caller=token)
+        response = await run_query(
+            supabase.table("user_progress")
+            .select("lesson_id")
+            .eq("user_id", user_id)
+            .eq("status", "completed"),
+            idempotent=True
+        )
+        completed = {row["lesson_id"] for row in response.data}
+
+        unlocked = _unlocked_lessons(order, completed)
+        return CourseUnlocks(
+            course_id=course_id,
+            user_id=user_id,
+            unlocked_lesson_ids=unlocked,
+            next_lesson_id=next((lesson_id for lesson_id in unlocked if lesson_id not in completed), None)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        handle_supabase_error(e, "Failed to resolve unlocked lessons")
+
+
 @router.post("", response_model=ProgressResponse)
 async def update_lesson_progress(
     progress: ProgressCreate,
@@ -33,35 +85,17 @@ async def update_lesson_progress(
     try:
         supabase = get_admin_supabase()
         
-        existing = supabase.table("user_progress") \
-            .select("*") \
-            .eq("user_id", progress.user_id) \
-            .eq("lesson_id", progress.lesson_id) \
-            .execute()
+        # One atomic insert-or-update on the (user_id, lesson_id) unique key
+        response = await run_query(
+            supabase.table("user_progress")
+            .upsert(progress.model_dump(), on_conflict="user_id,lesson_id")
+        )
+        
+        if not response.data:
+            raise HTTPException(status_code=500, detail="Failed to update progress")
         
-        if existing.data:
-            update_data = progress.model_dump()
-            del update_data["user_id"]
-            del update_data["lesson_id"]
-            
-            response = supabase.table("user_progress") \
-                .update(update_data) \
-                .eq("id", existing.data[0]["id"]) \
-                .execute()
-            
-            if not response.data:
-                raise HTTPException(status_code=500, detail="Failed to update progress")
-            
-            return response.data[0]
-        else:
-            response = supabase.table("user_progress") \
-                .insert(progress.model_dump()) \
-                .execute()
-            
-            if not response.data:
-                raise HTTPException(status_code=500, detail="Failed to create progress")
-            
-            return response.data[0]
+        mark_write(token)
+        return response.data[0]
     except HTTPException:
         raise
     except Exception as e:
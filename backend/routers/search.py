@@ -1,19 +1,63 @@
 from typing import List
 
-from constants import MAX_QUERY_LENGTH
+from config import settings
+from constants import (
+    MAX_QUERY_LENGTH,
+    SEARCH_CACHE_MAX_SIZE,
+    SEARCH_CACHE_TTL_SECONDS,
+    SEARCH_COURSE_LIMIT,
+    SEARCH_LESSON_LIMIT,
+    SUGGEST_DEFAULT_LIMIT,
+    SUGGEST_MAX_LIMIT,
+)
 from fastapi import APIRouter, Depends, HTTPException, Query
 from models import (
     CodeValidationRequest,
     CodeValidationResponse,
     SearchQuery,
     SearchResult,
+    SearchSuggestion,
+)
+from services import (
+    code_executor,
+    course_catalog,
+    run_query,
+    get_read_supabase,
+    search_index,
+    normalize_text,
 )
-from services import code_executor
-from supabase_client import get_supabase
 from utils import get_access_token, handle_supabase_error
+from utils.cache import TTLCache
 
 router = APIRouter(tags=["Utilities"])
 
+# (published catalog ETag, normalized query) -> results. A catalog write
+# changes the ETag, so stale entries are never hit again and age out.
+_search_cache = TTLCache(max_size=SEARCH_CACHE_MAX_SIZE, ttl_seconds=SEARCH_CACHE_TTL_SECONDS)
+
+
+async def _search_postgres(query: str) -> List[SearchResult]:
+    """Full-text search in the database; one RPC returns courses and lessons"""
+    # The RPC ignores case, diacritics and extra whitespace as well
+    query = normalize_text(query)
+    cache_key = (await course_catalog.published_etag(), query)
+    cached = _search_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    response = await run_query(
+        get_read_supabase().rpc("search_content", {
+            "p_query": query,
+            "p_course_limit": SEARCH_COURSE_LIMIT,
+            "p_lesson_limit": SEARCH_LESSON_LIMIT,
+        }),
+        idempotent=True,
+    )
+    # Rows come back ordered: courses, then lessons, each best rank first
+    results = [SearchResult.model_validate(row) for row in response.data]
+    _search_cache.set(cache_key, results)
+    return results
+
 
 @router.get("/search", response_model=List[SearchResult])
 async def search_content(
@@ -27,67 +71,30 @@ async def search_content(
         query_obj = SearchQuery(query=q)
         query = query_obj.query
 
-        supabase = get_supabase()
-        results = []
-
-        courses_response = (
-            supabase.table("courses")
-            .select("id, title, description")
-            .or_(f"title.ilike.%{query}%,description.ilike.%{query}%")
-            .eq("is_published", True)
-            .limit(5)
-            .execute()
-        )
-
-        for course in courses_response.data:
-            results.append(
-                SearchResult(
-                    type="course",
-                    id=course["id"],
-                    title=course["title"],
-                    description=course.get("description"),
-                    course_name=None,
-                    module_name=None,
-                )
-            )
-
-        lessons_response = (
-            supabase.table("lessons")
-            .select(
-                "id, title, description, module_id, modules(title, course_id, courses(title))"
-            )
-            .or_(f"title.ilike.%{query}%,description.ilike.%{query}%")
-            .limit(10)
-            .execute()
-        )
-
-        for lesson in lessons_response.data:
-            module_name = None
-            course_name = None
-
-            if "modules" in lesson and lesson["modules"]:
-                module_name = lesson["modules"].get("title")
-                if "courses" in lesson["modules"] and lesson["modules"]["courses"]:
-                    course_name = lesson["modules"]["courses"].get("title")
-
-            results.append(
-                SearchResult(
-                    type="lesson",
-                    id=lesson["id"],
-                    title=lesson["title"],
-                    description=lesson.get("description"),
-                    course_name=course_name,
-                    module_name=module_name,
-                )
-            )
-
-        return results
+        if settings.search_mode == "postgres":
+            return await _search_postgres(query)
+        return await search_index.search(query)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         handle_supabase_error(e, "Search failed")
 
 
+@router.get("/search/suggest", response_model=List[SearchSuggestion])
+async def suggest_titles(
+    q: str = Query(
+        ..., min_length=1, max_length=MAX_QUERY_LENGTH, description="Title prefix"
+    ),
+    limit: int = Query(SUGGEST_DEFAULT_LIMIT, ge=1, le=SUGGEST_MAX_LIMIT),
+    token: str = Depends(get_access_token),
+):
+    """Course and lesson titles matching what the user has typed so far"""
+    try:
+        return await search_index.suggest(q, limit)
+    except Exception as e:
+        handle_supabase_error(e, "Suggestions failed")
+
+
 @router.post("/validate_code", response_model=CodeValidationResponse)
 async def validate_code(request: CodeValidationRequest):
     try:
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional
+from services import run_query, get_read_supabase, mark_write
 from supabase_client import get_admin_supabase
 from utils import get_access_token, handle_supabase_error
 
@@ -44,6 +45,37 @@ def calculate_level(total_xp: int) -> int:
     return max(1, (total_xp // 1000) + 1)
 
 
+async def ensure_profile(supabase, user, token: str) -> dict:
+    """
+    Returns the user's profile, creating it first if missing.
+    Reads go to the read client; only a missing profile costs a write. The
+    `ensure_profile` RPC (see migrations/001_single_round_trip_writes.sql)
+    inserts with ON CONFLICT DO NOTHING and returns the row, so concurrent
+    first requests can't race each other into a duplicate key error.
+    """
+    response = await run_query(
+        get_read_supabase(admin=True, caller=token).table("profiles")
+        .select("*")
+        .eq("id", user.id),
+        idempotent=True
+    )
+    if response.data:
+        return response.data[0]
+    
+    response = await run_query(
+        supabase.rpc("ensure_profile", {
+            "p_id": user.id,
+            "p_username": user.email.split("@")[0] if user.email else "User"
+        })
+    )
+    
+    if not response.data:
+        raise HTTPException(status_code=500, detail="Failed to load profile")
+    
+    mark_write(token)
+    return response.data[0]
+
+
 @router.get("/me", response_model=UserProfile)
 async def get_current_user_profile(
     token: str = Depends(get_access_token)
@@ -59,28 +91,15 @@ async def get_current_user_profile(
         user_id = user_response.user.id
         user = user_response.user
         
-        profile_response = supabase.table("profiles") \
-            .select("*") \
-            .eq("id", user_id) \
-            .execute()
-        
-        if not profile_response.data:
-            profile_data = {
-                "id": user_id,
-                "username": user.email.split("@")[0] if user.email else "User",
-                "streak_days": 0,
-                "onboarding_completed": False
-            }
-            supabase.table("profiles").insert(profile_data).execute()
-            profile = profile_data
-        else:
-            profile = profile_response.data[0]
+        profile = await ensure_profile(supabase, user, token)
         
-        completed_progress = supabase.table("user_progress") \
-            .select("lesson_id, lessons(xp_reward)") \
-            .eq("user_id", user_id) \
-            .eq("status", "completed") \
-            .execute()
+        completed_progress = await run_query(
+            get_read_supabase(admin=True, caller=token).table("user_progress")
+            .select("lesson_id, lessons(xp_reward)")
+            .eq("user_id", user_id)
+            .eq("status", "completed"),
+            idempotent=True
+        )
         
         total_xp = 0
         if completed_progress.data:
@@ -127,27 +146,15 @@ async def get_user_profile(
         
         user = user_response.user
         
-        profile_response = supabase.table("profiles") \
-            .select("*") \
-            .eq("id", user_id) \
-            .execute()
-        
-        if not profile_response.data:
-            profile_data = {
-                "id": user_id,
-                "username": user.email.split("@")[0] if user.email else "User",
-                "streak_days": 0
-            }
-            supabase.table("profiles").insert(profile_data).execute()
-            profile = profile_data
-        else:
-            profile = profile_response.data[0]
+        profile = await ensure_profile(supabase, user, token)
         
-        completed_progress = supabase.table("user_progress") \
-            .select("lesson_id, lessons(xp_reward)") \
-            .eq("user_id", user_id) \
-            .eq("status", "completed") \
-            .execute()
+        completed_progress = await run_query(
+            get_read_supabase(admin=True, caller=token).table("user_progress")
+            .select("lesson_id, lessons(xp_reward)")
+            .eq("user_id", user_id)
+            .eq("status", "completed"),
+            idempotent=True
+        )
         
         total_xp = 0
         if completed_progress.data:
@@ -185,13 +192,15 @@ async def get_user_statistics(
     token: str = Depends(get_access_token)
 ):
     try:
-        supabase = get_admin_supabase()
-        
-        lessons_response = supabase.table("user_progress") \
-            .select("*", count="exact") \
-            .eq("user_id", user_id) \
-            .eq("status", "completed") \
-            .execute()
+        supabase = get_read_supabase(admin=True, caller=token)
+        
+        lessons_response = await run_query(
+            supabase.table("user_progress")
+            .select("*", count="exact")
+            .eq("user_id", user_id)
+            .eq("status", "completed"),
+            idempotent=True
+        )
         
         total_lessons = lessons_response.count or 0
         
@@ -206,10 +215,12 @@ async def get_user_statistics(
                     total_score += progress.get("score", 0)
                     score_count += 1
         
-        activity_response = supabase.table("daily_activity") \
-            .select("time_spent_seconds") \
-            .eq("user_id", user_id) \
-            .execute()
+        activity_response = await run_query(
+            supabase.table("daily_activity")
+            .select("time_spent_seconds")
+            .eq("user_id", user_id),
+            idempotent=True
+        )
         
         if activity_response.data:
             for activity in activity_response.data:
@@ -237,19 +248,16 @@ async def update_user_avatar(
     try:
         supabase = get_admin_supabase()
         
-        existing = supabase.table("profiles") \
-            .select("*") \
-            .eq("id", user_id) \
-            .execute()
+        response = await run_query(
+            supabase.table("profiles")
+            .update({"avatar_url": request.avatar_url, "updated_at": "now()"})
+            .eq("id", user_id)
+        )
         
-        if existing.data:
-            supabase.table("profiles") \
-                .update({"avatar_url": request.avatar_url, "updated_at": "now()"}) \
-                .eq("id", user_id) \
-                .execute()
-        else:
+        if not response.data:
             raise HTTPException(status_code=404, detail="Profile not found")
         
+        mark_write(token)
         return {"success": True, "message": "Avatar updated"}
     except HTTPException:
         raise
@@ -266,19 +274,16 @@ async def update_user_username(
     try:
         supabase = get_admin_supabase()
         
-        existing = supabase.table("profiles") \
-            .select("*") \
-            .eq("id", user_id) \
-            .execute()
+        response = await run_query(
+            supabase.table("profiles")
+            .update({"username": request.username, "updated_at": "now()"})
+            .eq("id", user_id)
+        )
         
-        if existing.data:
-            supabase.table("profiles") \
-                .update({"username": request.username, "updated_at": "now()"}) \
-                .eq("id", user_id) \
-                .execute()
-        else:
+        if not response.data:
             raise HTTPException(status_code=404, detail="Profile not found")
         
+        mark_write(token)
         return {"success": True, "message": "Username updated"}
     except HTTPException:
         raise
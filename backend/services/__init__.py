@@ -1,6 +1,23 @@
 from .code_executor import code_executor, CodeExecutor
+from .database import run_query
+from .replicas import get_read_supabase, mark_write, replica_pool
+from .catalog import course_catalog, PUBLISHED_SNAPSHOT
+from .search_index import search_index, normalize_text
+from .course_tree import parse_course_tree, write_course_tree, export_course_tree, clone_course_tree
 
 __all__ = [
     "code_executor",
     "CodeExecutor",
+    "run_query",
+    "get_read_supabase",
+    "mark_write",
+    "replica_pool",
+    "course_catalog",
+    "PUBLISHED_SNAPSHOT",
+    "search_index",
+    "normalize_text",
+    "parse_course_tree",
+    "write_course_tree",
+    "export_course_tree",
+    "clone_course_tree",
 ]
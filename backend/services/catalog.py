@@ -0,0 +1,517 @@
+"""
+In-process course catalog cache.
+
+Holds every course as returned by the `*, modules(*, lessons(*))` select,
+stored as compact rows (see services.compact). The
+whole catalog is loaded at startup and refreshed in the background; admin
+writes re-fetch exactly the affected course (write-through), so the worker
+that served the write never serves stale data. Other workers converge on the
+next background refresh.
+
+ETags are content hashes rather than the local `version` counter, so every
+worker hands out the same validator for the same content. Rendered JSON is
+memoized per ETag as well (`snapshot`), so a course is validated and
+serialized once per change instead of once per request, and compressed once
+per change and encoding.
+
+Every change to the published catalog bumps `version` and is appended to a
+bounded change log (created/updated/deleted courses, modules and lessons),
+so clients can sync deltas instead of re-downloading the catalog. Versions
+are local to the process, so clients get them as "<epoch>.<version>"
+tokens, where the epoch is random per process. A token from another worker
+or from before a restart, or one the log cannot bridge, means resync.
+"""
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Iterable, List, Optional, Tuple
+import asyncio
+import bisect
+import time
+import logging
+import uuid
+
+from config import settings
+from constants import (
+    CATALOG_CHANGE_LOG_SIZE,
+    CATALOG_MISS_CACHE_SIZE,
+    CATALOG_MISS_TTL_SECONDS,
+    CATALOG_REFRESH_SECONDS,
+    CATALOG_SELECT,
+)
+from supabase_client import get_supabase
+from utils.cache import TTLCache
+from utils.compression import compress
+from utils.http_cache import combine_etags, content_etag
+from .compact import compact_row
+from .database import run_query
+from .replicas import get_read_supabase
+
+logger = logging.getLogger(__name__)
+
+# Snapshot key for rendered listings of published courses
+PUBLISHED_SNAPSHOT = "__published__"
+
+
+def _course_sort_key(course: dict) -> tuple:
+    return (course.get("order_index") or 0, str(course.get("id")))
+
+
+def _flatten(course: Optional[dict]) -> Dict[Tuple[str, str], dict]:
+    """(entity, id) -> row without nested children, for a published course"""
+    if course is None or not course.get("is_published"):
+        return {}
+
+    rows = {("course", course["id"]): {k: v for k, v in course.items() if k != "modules"}}
+    for module in course.get("modules") or []:
+        rows[("module", module["id"])] = {k: v for k, v in module.items() if k != "lessons"}
+        for lesson in module.get("lessons") or []:
+            rows[("lesson", lesson["id"])] = lesson
+    return rows
+
+
+def _diff(previous: Optional[dict], current: Optional[dict]) -> List[dict]:
+    before, after = _flatten(previous), _flatten(current)
+    changes = []
+    for (entity, entity_id), row in after.items():
+        old = before.get((entity, entity_id))
+        if old is None:
+            changes.append({"entity": entity, "id": entity_id, "op": "created", "data": row})
+        elif old != row:
+            changes.append({"entity": entity, "id": entity_id, "op": "updated", "data": row})
+    for entity, entity_id in before.keys() - after.keys():
+        changes.append({"entity": entity, "id": entity_id, "op": "deleted", "data": None})
+    return changes
+
+
+def _ordered_lessons(course: dict) -> Iterable[Tuple[dict, dict]]:
+    """(lesson, module) pairs in module then lesson order"""
+    for module in sorted(course.get("modules") or [], key=_course_sort_key):
+        for lesson in sorted(module.get("lessons") or [], key=_course_sort_key):
+            yield lesson, module
+
+
+def _build_navigation(course: dict) -> Dict[str, dict]:
+    """lesson id -> prev/next/position within the course, in module then lesson order"""
+    crumbs = [(lesson["id"], module) for lesson, module in _ordered_lessons(course)]
+
+    course_crumb = {"id": course["id"], "title": course.get("title")}
+    navigation = {}
+    for position, (lesson_id, module) in enumerate(crumbs):
+        navigation[lesson_id] = {
+            "lessonId": lesson_id,
+            "previousLessonId": crumbs[position - 1][0] if position > 0 else None,
+            "nextLessonId": crumbs[position + 1][0] if position + 1 < len(crumbs) else None,
+            "position": position + 1,
+            "totalLessons": len(crumbs),
+            "module": {"id": module["id"], "title": module.get("title")},
+            "course": course_crumb,
+        }
+    return navigation
+
+
+class CourseCatalog:
+    def __init__(self):
+        self._courses: Dict[str, dict] = {}
+        self._module_course: Dict[str, str] = {}
+        self._lessons: Dict[str, dict] = {}
+        self._etags: Dict[str, str] = {}
+        self._lesson_etags: Dict[str, str] = {}
+        # lesson id -> navigation entry, rebuilt per course whenever it is stored
+        self._navigation: Dict[str, dict] = {}
+        # course id -> (lesson id, is_locked) in course order
+        self._lesson_order: Dict[str, Tuple[Tuple[str, bool], ...]] = {}
+        self._published_etag: Optional[str] = None
+        # published courses in (order_index, id) order, rebuilt lazily after a change
+        self._published: Optional[List[dict]] = None
+        self._published_keys: List[tuple] = []
+        self._loaded = False
+        # (course id, generation) (or None for the whole catalog) -> fetch in flight
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        # course id -> number of invalidations; each one starts its own fetch
+        self._generations: Dict[str, int] = {}
+        # course id -> generation of the fetch whose result is stored; only
+        # for courses that exist or were invalidated by a write
+        self._stored_generations: Dict[str, int] = {}
+        # ids looked up and not found, so repeated misses stay off the database
+        self._missing = TTLCache(max_size=CATALOG_MISS_CACHE_SIZE, ttl_seconds=CATALOG_MISS_TTL_SECONDS)
+        # course id -> when it was last re-fetched from the primary
+        self._invalidated_at: Dict[str, float] = {}
+        # course/lesson id -> view -> (etag, {encoding or None: rendered JSON})
+        self._snapshots: Dict[str, Dict[str, Tuple[str, Dict[Optional[str], bytes]]]] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.version = 0
+        # Distinguishes this process's versions from any other worker's
+        self.epoch = uuid.uuid4().hex[:12]
+        self._changes: Deque[dict] = deque(maxlen=CATALOG_CHANGE_LOG_SIZE)
+        # deltas are available for every version after this one
+        self._changes_since = 0
+
+    async def _single_flight(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Concurrent callers asking for the same key share one fetch"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def _store(self, course: dict) -> None:
+        previous = self._courses.get(course["id"])
+        if previous is not None:
+            self._forget(previous)
+
+        self._etags[course["id"]] = content_etag(course)
+        course = compact_row(course)
+        self._courses[course["id"]] = course
+        self._published_etag = None
+        self._published = None
+        for module in course.get("modules") or []:
+            self._module_course[module["id"]] = course["id"]
+            for lesson in module.get("lessons") or []:
+                self._lessons[lesson["id"]] = lesson
+        self._navigation.update(_build_navigation(course))
+        self._lesson_order[course["id"]] = tuple(
+            (lesson["id"], bool(lesson.get("is_locked"))) for lesson, _ in _ordered_lessons(course)
+        )
+
+    def _forget(self, course: dict) -> None:
+        self._etags.pop(course["id"], None)
+        self._lesson_order.pop(course["id"], None)
+        self._snapshots.pop(course["id"], None)
+        self._snapshots.pop(PUBLISHED_SNAPSHOT, None)
+        self._published_etag = None
+        self._published = None
+        for module in course.get("modules") or []:
+            self._module_course.pop(module["id"], None)
+            for lesson in module.get("lessons") or []:
+                self._lessons.pop(lesson["id"], None)
+                self._lesson_etags.pop(lesson["id"], None)
+                self._navigation.pop(lesson["id"], None)
+                self._snapshots.pop(lesson["id"], None)
+
+    async def _load_all(self) -> None:
+        started = time.monotonic()
+        response = await run_query(
+            get_read_supabase().table("courses")
+            .select(CATALOG_SELECT)
+            .order("order_index"),
+            idempotent=True
+        )
+
+        # Courses re-fetched from the primary while this (possibly lagging)
+        # snapshot was loading keep their fresher copy
+        recent = started - settings.read_your_writes_seconds
+        fresh = {
+            course_id for course_id, at in self._invalidated_at.items() if at >= recent
+        }
+        courses = {course["id"]: course for course in response.data}
+        for course_id in fresh:
+            if course_id in self._courses:
+                courses[course_id] = self._courses[course_id]
+            else:
+                courses.pop(course_id, None)
+
+        previous = self._courses
+        self._courses = {}
+        self._published = None
+        self._module_course = {}
+        self._lessons = {}
+        self._etags = {}
+        self._lesson_etags = {}
+        self._navigation = {}
+        self._lesson_order = {}
+        for course in courses.values():
+            self._store(course)
+        # Unchanged content keeps its ETag, so its rendered JSON stays valid
+        self._snapshots = {
+            key: views for key, views in self._snapshots.items()
+            if key in self._courses or key in self._lessons or key == PUBLISHED_SNAPSHOT
+        }
+        self._invalidated_at = {
+            course_id: at for course_id, at in self._invalidated_at.items() if at >= recent
+        }
+        self._stored_generations = {
+            course_id: generation for course_id, generation in self._stored_generations.items()
+            if course_id in self._courses or course_id in self._generations
+        }
+
+        if self._loaded:
+            self._log_changes(
+                change
+                for course_id in previous.keys() | courses.keys()
+                for change in _diff(previous.get(course_id), courses.get(course_id))
+            )
+        else:
+            self.version += 1
+            self._changes_since = self.version
+        self._loaded = True
+        logger.info(f"Course catalog loaded: {len(self._courses)} courses")
+
+    async def _fetch_course(self, course_id: str, generation: int) -> Optional[dict]:
+        """
+        Fetches one course and stores the result. Generation 0 is a plain cache
+        miss, looked up on the read client; invalidations read the primary.
+        """
+        client = get_supabase() if generation else get_read_supabase()
+        response = await run_query(
+            client.table("courses")
+            .select(CATALOG_SELECT)
+            .eq("id", course_id),
+            idempotent=True
+        )
+
+        if not response.data and not generation:
+            self._missing.set(course_id, True)
+            return self._courses.get(course_id)
+        if generation < self._stored_generations.get(course_id, 0):
+            # A fetch started after a later invalidation already stored a newer copy
+            return self._courses.get(course_id)
+        self._stored_generations[course_id] = generation
+        if generation:
+            self._invalidated_at[course_id] = time.monotonic()
+        previous = self._courses.get(course_id)
+        if response.data:
+            self._store(response.data[0])
+        elif previous is not None:
+            del self._courses[course_id]
+            self._forget(previous)
+
+        if self._loaded:
+            self._log_changes(_diff(previous, self._courses.get(course_id)))
+        return self._courses.get(course_id)
+
+    def _log_changes(self, changes: Iterable[dict]) -> None:
+        """Records one catalog version for a batch of changes (if there are any)"""
+        changes = list(changes)
+        if not changes:
+            return
+
+        self.version += 1
+        overflow = len(self._changes) + len(changes) - CATALOG_CHANGE_LOG_SIZE
+        if overflow > len(self._changes):
+            # This batch alone does not fit
+            self._changes_since = self.version
+        elif overflow > 0:
+            # The oldest entries fall out of the log
+            self._changes_since = self._changes[overflow - 1]["version"]
+        for change in changes:
+            self._changes.append({"version": self.version, **change})
+
+    def version_token(self, version: Optional[int] = None) -> str:
+        return f"{self.epoch}.{self.version if version is None else version}"
+
+    async def get_changes(self, since: str) -> Tuple[str, Optional[List[dict]]]:
+        """
+        (current version token, changes after the `since` token), or
+        (current version token, None) when `since` comes from another process
+        or the log cannot bridge the gap, and the client has to resync.
+        """
+        await self._ensure_loaded()
+        epoch, _, number = since.partition(".")
+        if epoch != self.epoch or not number.isdigit():
+            return self.version_token(), None
+
+        since_version = int(number)
+        if since_version < self._changes_since or since_version > self.version:
+            return self.version_token(), None
+        return self.version_token(), [
+            {**change, "version": self.version_token(change["version"])}
+            for change in self._changes if change["version"] > since_version
+        ]
+
+    async def refresh(self) -> None:
+        """Rebuilds the whole catalog"""
+        await self._single_flight(None, self._load_all)
+
+    async def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            await self.refresh()
+
+    async def get_published_courses(self) -> List[dict]:
+        await self._ensure_loaded()
+        if self._published is None:
+            self._published = sorted(
+                (course for course in self._courses.values() if course.get("is_published")),
+                key=_course_sort_key
+            )
+            self._published_keys = [_course_sort_key(course) for course in self._published]
+        return self._published
+
+    async def get_published_page(
+        self,
+        after: Optional[Tuple[int, str]],
+        limit: int
+    ) -> Tuple[List[dict], Optional[Tuple[int, str]]]:
+        """
+        Keyset page of published courses that sort after `after`. Returns the
+        page and the key to continue from (None on the last page).
+        """
+        courses = await self.get_published_courses()
+        start = bisect.bisect_right(self._published_keys, after) if after else 0
+        page = courses[start:start + limit]
+        has_more = start + limit < len(courses)
+        return page, (self._published_keys[start + limit - 1] if has_more else None)
+
+    async def get_course(self, course_id: str) -> Optional[dict]:
+        await self._ensure_loaded()
+        course = self._courses.get(course_id)
+        if course is None:
+            if self._missing.get(course_id):
+                return None
+            # May have been created on another worker since the last refresh
+            generation = self._generations.get(course_id, 0)
+            course = await self._single_flight(
+                (course_id, generation), lambda: self._fetch_course(course_id, generation)
+            )
+        return course
+
+    async def published_etag(self) -> str:
+        await self._ensure_loaded()
+        if self._published_etag is None:
+            courses = await self.get_published_courses()
+            self._published_etag = combine_etags(*(self._etags[course["id"]] for course in courses))
+        return self._published_etag
+
+    async def course_etag(self, course_id: str) -> Optional[str]:
+        if await self.get_course(course_id) is None:
+            return None
+        return self._etags.get(course_id)
+
+    async def get_module(self, module_id: str) -> Optional[dict]:
+        """Module (with lessons) from the cached course that owns it"""
+        course_id = await self.course_id_for_module(module_id)
+        course = await self.get_course(course_id) if course_id else None
+        if course is None:
+            return None
+        return next(
+            (module for module in course.get("modules") or [] if module["id"] == module_id),
+            None
+        )
+
+    async def get_navigation(self, lesson_id: str) -> Optional[dict]:
+        """Prev/next lesson, position and breadcrumb of a cached lesson"""
+        await self._ensure_loaded()
+        return self._navigation.get(lesson_id)
+
+    async def get_lesson_order(self, course_id: str) -> Optional[Tuple[Tuple[str, bool], ...]]:
+        """(lesson id, is_locked) pairs of a course in the order lessons are taken"""
+        if await self.get_course(course_id) is None:
+            return None
+        return self._lesson_order.get(course_id)
+
+    def cached_course_etag(self, course_id: str) -> Optional[str]:
+        return self._etags.get(course_id)
+
+    async def get_lesson(self, lesson_id: str) -> Optional[dict]:
+        """Lesson row from the cached catalog; None if it is not part of any cached course"""
+        await self._ensure_loaded()
+        return self._lessons.get(lesson_id)
+
+    def lesson_etag(self, lesson_id: str) -> Optional[str]:
+        lesson = self._lessons.get(lesson_id)
+        if lesson is None:
+            return None
+        etag = self._lesson_etags.get(lesson_id)
+        if etag is None:
+            etag = self._lesson_etags[lesson_id] = content_etag(lesson)
+        return etag
+
+    def snapshot(
+        self,
+        key: str,
+        view: str,
+        etag: str,
+        render: Callable[[], bytes]
+    ) -> bytes:
+        """Rendered JSON for a cached course or lesson, re-rendered only when `etag` changes"""
+        views = self._snapshots.setdefault(key, {})
+        cached = views.get(view)
+        if cached is None or cached[0] != etag:
+            cached = views[view] = (etag, {None: render()})
+        return cached[1][None]
+
+    async def encoded_snapshot(
+        self,
+        key: str,
+        view: str,
+        etag: str,
+        render: Callable[[], bytes],
+        encoding: Optional[str]
+    ) -> bytes:
+        """
+        `snapshot` in the given Content-Encoding. Compressed variants are produced
+        off the event loop on first use, once however many requests wait for
+        them, and kept alongside the rendered JSON.
+        """
+        body = self.snapshot(key, view, etag, render)
+        if encoding is None:
+            return body
+
+        compressed = self._snapshots[key][view][1].get(encoding)
+        if compressed is not None:
+            return compressed
+
+        async def encode() -> bytes:
+            compressed = await asyncio.to_thread(compress, body, encoding)
+            current = self._snapshots.get(key, {}).get(view)
+            if current is not None and current[0] == etag:
+                current[1][encoding] = compressed
+            return compressed
+
+        # Concurrent cold requests (right after an invalidation) share one compression
+        return await self._single_flight(("encoded", key, view, etag, encoding), encode)
+
+    async def invalidate_course(self, course_id: str) -> Optional[dict]:
+        """
+        Re-fetches one course from the primary after an admin write and returns
+        it. Never joins a fetch already in flight, which may have read the row
+        before the write committed.
+        """
+        generation = self._generations[course_id] = self._generations.get(course_id, 0) + 1
+        self._missing.invalidate(course_id)
+        return await self._single_flight(
+            (course_id, generation), lambda: self._fetch_course(course_id, generation)
+        )
+
+    async def invalidate_module(self, module_id: str) -> Optional[dict]:
+        """Re-fetches the course that owns the module and returns it"""
+        course_id = await self.course_id_for_module(module_id)
+        if course_id is None:
+            return None
+        return await self.invalidate_course(course_id)
+
+    async def course_id_for_module(self, module_id: str) -> Optional[str]:
+        course_id = self._module_course.get(module_id)
+        if course_id is not None:
+            return course_id
+
+        response = await run_query(
+            get_supabase().table("modules")
+            .select("course_id")
+            .eq("id", module_id),
+            idempotent=True
+        )
+        return response.data[0]["course_id"] if response.data else None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Course catalog refresh failed: {str(e)}", exc_info=True)
+            await asyncio.sleep(CATALOG_REFRESH_SECONDS)
+
+    def start(self) -> None:
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+
+course_catalog = CourseCatalog()
@@ -0,0 +1,98 @@
+"""
+Compact read-only rows for the in-process course catalog.
+
+Supabase returns every course tree as nested dicts, and with several workers
+each holding the whole catalog that adds up. `compact_row` turns a row into
+a `Row`: a slotted mapping whose column names live once per distinct column
+set (`_Shape`) instead of once per row, whose short strings (ids, enums,
+timestamps) are interned, and whose lesson `content` is kept as UTF-8 JSON
+until somebody reads it. Nested lists become tuples of rows.
+
+`Row` is a `Mapping`, so catalog code, pydantic validation and
+`content_etag` treat it like the dict it replaces.
+"""
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Tuple
+import json
+import sys
+
+# Strings up to this length are interned (ids, enum values, timestamps)
+INTERN_MAX_LENGTH = 64
+
+# Columns stored as JSON bytes and decoded on access
+PACKED_COLUMNS = frozenset({"content"})
+
+
+class _Shape:
+    __slots__ = ("keys", "index", "packed")
+
+    def __init__(self, keys: Tuple[str, ...]):
+        self.keys = keys
+        self.index = {key: position for position, key in enumerate(keys)}
+        self.packed = frozenset(
+            position for position, key in enumerate(keys) if key in PACKED_COLUMNS
+        )
+
+
+_shapes: Dict[Tuple[str, ...], _Shape] = {}
+
+
+def _shape_for(keys: Tuple[str, ...]) -> _Shape:
+    shape = _shapes.get(keys)
+    if shape is None:
+        shape = _shapes[keys] = _Shape(tuple(sys.intern(key) for key in keys))
+    return shape
+
+
+class Row(Mapping):
+    __slots__ = ("_shape", "_values")
+
+    def __init__(self, shape: _Shape, values: Tuple[Any, ...]):
+        self._shape = shape
+        self._values = values
+
+    def __getitem__(self, key: str) -> Any:
+        position = self._shape.index[key]
+        value = self._values[position]
+        if position in self._shape.packed and value is not None:
+            return json.loads(value)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._shape.keys)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._shape.index
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Row):
+            # Packed columns compare as bytes, without decoding
+            return self._shape is other._shape and self._values == other._values
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Row({dict(self)!r})"
+
+
+def _compact_value(key: str, value: Any) -> Any:
+    if key in PACKED_COLUMNS and value is not None:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+    if isinstance(value, str):
+        return sys.intern(value) if len(value) <= INTERN_MAX_LENGTH else value
+    if isinstance(value, list):
+        return tuple(compact_row(item) if isinstance(item, dict) else item for item in value)
+    return value
+
+
+def compact_row(row: Mapping) -> Row:
+    """Compact copy of a (nested) row; rows that are already compact are returned as is"""
+    if isinstance(row, Row):
+        return row
+
+    shape = _shape_for(tuple(row.keys()))
+    return Row(shape, tuple(_compact_value(key, value) for key, value in row.items()))
@@ -0,0 +1,286 @@
+"""
+Static content pack of the published catalog.
+
+Renders the published catalog into content-hashed JSON files that can be
+served from disk or a CDN without touching the API:
+
+    manifest.json                   entry point, the only file that is not hashed
+    courses.<hash>.json             same body as GET /courses
+    courses/<id>.<hash>.json        same body as GET /courses/{id}
+    lessons/<id>.<hash>.json        same body as GET /lessons/{id}
+
+Exports are incremental: a course whose ETag matches the previous manifest
+is not rendered again, and files are only written when their hash is new.
+Files referenced by neither the new nor the previous manifest are removed,
+so clients holding the previous manifest can still finish loading it. Only
+files an export wrote are ever removed: they are listed in a ledger next to
+the manifest, anything else in the directory is left alone. Rendering runs
+in a worker thread.
+
+With CONTENT_PACK_DIR set, the API re-exports after every catalog change.
+Only one process exports into a directory at a time: the first worker to
+take the directory's lock file keeps it, the others stay idle (and take
+over if it goes away). The manifest is replaced atomically before
+unreferenced files are pruned. One-off export:
+
+    python -m services.content_pack --out ./content-pack
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+from pydantic import TypeAdapter
+from typing import Dict, List, Optional, Set, Tuple
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory locks (Windows): run a single exporting process there
+    fcntl = None
+
+from config import settings
+from constants import CONTENT_PACK_POLL_SECONDS
+from models import CourseResponse, LessonResponse
+from utils.http_cache import content_etag
+from .catalog import course_catalog, PUBLISHED_SNAPSHOT
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".lock"
+# Files written by exports and still on disk, one path per line
+LEDGER_NAME = ".written"
+
+_course_adapter = TypeAdapter(CourseResponse)
+_lesson_adapter = TypeAdapter(LessonResponse)
+
+
+def _hashed_name(prefix: str, body: bytes) -> str:
+    return f"{prefix}.{hashlib.sha256(body).hexdigest()[:16]}.json"
+
+
+# Rendering runs in a worker thread while the catalog may change, so ETags
+# are passed in or derived from the row itself, never looked up by id
+
+def _course_body(course: dict, etag: str) -> bytes:
+    """Shares the catalog snapshot GET /courses/{id} serves"""
+    return course_catalog.snapshot(
+        course["id"],
+        "full",
+        etag,
+        lambda: _course_adapter.dump_json(_course_adapter.validate_python(course))
+    )
+
+
+def _lesson_body(lesson: dict) -> bytes:
+    """Shares the catalog snapshot GET /lessons/{id} serves"""
+    return course_catalog.snapshot(
+        lesson["id"],
+        "full",
+        content_etag(lesson),
+        lambda: _lesson_adapter.dump_json(_lesson_adapter.validate_python(lesson))
+    )
+
+
+class ContentPackExporter:
+    def __init__(self, output_dir: str):
+        self.output_dir = Path(output_dir) if output_dir else None
+        self._exported_version: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        # Open while this process holds the directory's lock
+        self._lock_file = None
+
+    def _try_lock(self) -> bool:
+        """Takes the directory's lock without waiting; True while this process holds it"""
+        if self._lock_file is not None or fcntl is None:
+            return True
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.output_dir / LOCK_NAME, "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _unlock(self) -> None:
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _read_manifest(self) -> dict:
+        try:
+            return json.loads((self.output_dir / MANIFEST_NAME).read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _read_ledger(self) -> Set[str]:
+        try:
+            return set(filter(None, (self.output_dir / LEDGER_NAME).read_text().splitlines()))
+        except OSError:
+            return set()
+
+    def _render_course(self, course: dict, etag: str, files: Dict[str, bytes]) -> dict:
+        body = _course_body(course, etag)
+        entry = {
+            "etag": etag,
+            "file": _hashed_name(f"courses/{course['id']}", body),
+            "lessons": {},
+        }
+        files[entry["file"]] = body
+
+        for module in course.get("modules") or []:
+            for lesson in module.get("lessons") or []:
+                lesson_body = _lesson_body(lesson)
+                name = _hashed_name(f"lessons/{lesson['id']}", lesson_body)
+                entry["lessons"][lesson["id"]] = name
+                files[name] = lesson_body
+        return entry
+
+    async def export(self) -> dict:
+        """Brings the pack up to date with the catalog and returns the new manifest"""
+        if not self._try_lock():
+            raise RuntimeError(f"Another process is exporting to {self.output_dir}")
+
+        courses = await course_catalog.get_published_courses()
+        # Taken with the course list, before anything can change the catalog
+        etags = {course["id"]: course_catalog.cached_course_etag(course["id"]) for course in courses}
+        published_etag = await course_catalog.published_etag()
+        version = course_catalog.version
+        previous = await asyncio.to_thread(self._read_manifest)
+
+        unchanged = {
+            course_id: entry for course_id, entry in previous.get("courses", {}).items()
+            if entry.get("etag") == etags.get(course_id)
+        }
+        changed = [course for course in courses if course["id"] not in unchanged]
+        files, rendered, listing_name = await asyncio.to_thread(
+            self._render, courses, changed, etags, published_etag
+        )
+        entries = {
+            course["id"]: unchanged.get(course["id"]) or rendered[course["id"]] for course in courses
+        }
+
+        manifest = {
+            "version": course_catalog.version_token(version),
+            "etag": published_etag,
+            "generatedAt": datetime.now(timezone.utc).isoformat(),
+            "catalog": listing_name,
+            "courses": entries,
+        }
+        written = await asyncio.to_thread(self._write, files, manifest, previous)
+        self._exported_version = version
+        logger.info(f"Content pack v{version}: {written} new files, {len(entries)} courses")
+        return manifest
+
+    def _render(
+        self,
+        courses: List[dict],
+        changed: List[dict],
+        etags: Dict[str, str],
+        published_etag: str
+    ) -> Tuple[Dict[str, bytes], Dict[str, dict], str]:
+        """(files to write, manifest entries of `changed`, listing file name)"""
+        files: Dict[str, bytes] = {}
+        rendered = {
+            course["id"]: self._render_course(course, etags[course["id"]], files)
+            for course in changed
+        }
+
+        # Same snapshot as the unpaginated full view of GET /courses
+        listing = course_catalog.snapshot(
+            PUBLISHED_SNAPSHOT,
+            "full::",
+            published_etag,
+            lambda: b"[" + b",".join(_course_body(course, etags[course["id"]]) for course in courses) + b"]"
+        )
+        listing_name = _hashed_name("courses", listing)
+        files[listing_name] = listing
+        return files, rendered, listing_name
+
+    def _write(self, files: Dict[str, bytes], manifest: dict, previous: dict) -> int:
+        # Files of the previous manifest count as written by an export too
+        # (directories exported before the ledger existed)
+        owned = self._read_ledger() | _referenced(previous)
+        written = 0
+        for name, body in files.items():
+            path = self.output_dir / name
+            if path.exists():
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, path)
+            written += 1
+        owned.update(files)
+
+        manifest_path = self.output_dir / MANIFEST_NAME
+        tmp = manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2))
+        os.replace(tmp, manifest_path)
+
+        keep = _referenced(manifest) | _referenced(previous)
+        for name in owned - keep:
+            (self.output_dir / name).unlink(missing_ok=True)
+
+        ledger_path = self.output_dir / LEDGER_NAME
+        tmp = ledger_path.with_suffix(".tmp")
+        tmp.write_text("".join(f"{name}\n" for name in sorted(owned & keep)))
+        os.replace(tmp, ledger_path)
+        return written
+
+    async def _export_loop(self) -> None:
+        while True:
+            try:
+                if course_catalog.version != self._exported_version and self._try_lock():
+                    await self.export()
+            except Exception as e:
+                logger.error(f"Content pack export failed: {str(e)}", exc_info=True)
+            await asyncio.sleep(CONTENT_PACK_POLL_SECONDS)
+
+    def start(self) -> None:
+        if self.output_dir is not None and self._task is None:
+            self._task = asyncio.create_task(self._export_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._unlock()
+
+
+def _referenced(manifest: dict) -> set:
+    names = {manifest["catalog"]} if manifest.get("catalog") else set()
+    for entry in manifest.get("courses", {}).values():
+        names.add(entry["file"])
+        names.update(entry["lessons"].values())
+    return names
+
+
+content_pack = ContentPackExporter(settings.content_pack_dir)
+
+
+async def _main(output_dir: str) -> None:
+    exporter = ContentPackExporter(output_dir)
+    try:
+        manifest = await exporter.export()
+    finally:
+        exporter._unlock()
+    print(f"Exported {len(manifest['courses'])} courses to {output_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the published catalog as static JSON")
+    parser.add_argument("--out", default=settings.content_pack_dir or "content-pack")
+    args = parser.parse_args()
+    asyncio.run(_main(args.out))
@@ -0,0 +1,191 @@
+"""
+Bulk import/export of whole course trees as NDJSON, and server-side clones.
+
+A tree is one `course` record followed by its `module` records, each module
+followed by its `lesson` records (see `CourseTreeRecord`). Imports are
+validated line by line while the body streams in and nothing is written
+until the whole tree is valid. Rows get their ids up front, so the course is
+one insert, all modules one insert and lessons IMPORT_BATCH_SIZE rows per
+insert. If a batch fails, the half-written course is deleted again (modules
+and lessons go with it through the foreign key cascade), with a budget of
+its own, so it also happens when the request ran out of time. Clones reuse the
+same write path with a tree copied from a freshly fetched course.
+"""
+from fastapi import HTTPException
+from pydantic import TypeAdapter, ValidationError
+from pydantic.alias_generators import to_snake
+from typing import AsyncIterator, Iterator, List, Mapping, Optional
+import asyncio
+import json
+import logging
+import uuid
+
+from constants import COMPENSATION_TIMEOUT_SECONDS, IMPORT_BATCH_SIZE, IMPORT_MAX_RECORDS
+from models import (
+    CourseBase,
+    LessonBase,
+    ModuleBase,
+    CourseTreeCourse,
+    CourseTreeModule,
+    CourseTreeRecord,
+)
+from supabase_client import get_admin_supabase
+from .database import run_compensation, run_query
+
+logger = logging.getLogger(__name__)
+
+_record_adapter = TypeAdapter(CourseTreeRecord)
+
+
+class CourseTree:
+    def __init__(self):
+        self.course: Optional[dict] = None
+        self.modules: List[dict] = []
+        self.lessons: List[dict] = []
+
+    def add(self, record, line: int) -> None:
+        row = record.model_dump(by_alias=True, exclude={"kind"})
+        row["id"] = str(uuid.uuid4())
+
+        if isinstance(record, CourseTreeCourse):
+            if self.course is not None:
+                raise _line_error(line, "only one course per import")
+            self.course = row
+        elif self.course is None:
+            raise _line_error(line, "the first record must be the course")
+        elif isinstance(record, CourseTreeModule):
+            row["course_id"] = self.course["id"]
+            self.modules.append(row)
+        elif not self.modules:
+            raise _line_error(line, "lesson before any module")
+        else:
+            row["module_id"] = self.modules[-1]["id"]
+            self.lessons.append(row)
+
+
+# Columns the database fills in for the copy
+_GENERATED_COLUMNS = {"id", "created_at", "updated_at"}
+
+
+def _copy_row(row: Mapping, children: Optional[str] = None) -> dict:
+    copy = {
+        key: value for key, value in row.items()
+        if key not in _GENERATED_COLUMNS and key != children
+    }
+    copy["id"] = str(uuid.uuid4())
+    return copy
+
+
+def clone_course_tree(course: Mapping, overrides: dict) -> CourseTree:
+    """Copy of a catalog course with fresh ids; `overrides` are applied to the course row"""
+    tree = CourseTree()
+    tree.course = {**_copy_row(course, "modules"), **overrides}
+    for module in course.get("modules") or []:
+        module_row = _copy_row(module, "lessons")
+        module_row["course_id"] = tree.course["id"]
+        tree.modules.append(module_row)
+        for lesson in module.get("lessons") or []:
+            lesson_row = _copy_row(lesson)
+            lesson_row["module_id"] = module_row["id"]
+            tree.lessons.append(lesson_row)
+    return tree
+
+
+def _line_error(line: int, message: str) -> HTTPException:
+    return HTTPException(status_code=422, detail=f"Line {line}: {message}")
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *complete, buffer = buffer.split(b"\n")
+        for line in complete:
+            yield line
+    if buffer:
+        yield buffer
+
+
+async def parse_course_tree(chunks: AsyncIterator[bytes]) -> CourseTree:
+    """Validates an NDJSON body as it streams in; raises 422 naming the bad line"""
+    tree = CourseTree()
+    records = 0
+    line_number = 0
+
+    async for line in _lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+
+        records += 1
+        if records > IMPORT_MAX_RECORDS:
+            raise _line_error(line_number, f"more than {IMPORT_MAX_RECORDS} records")
+
+        try:
+            record = _record_adapter.validate_json(line)
+        except ValidationError as e:
+            error = e.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            raise _line_error(line_number, f"{location}: {error['msg']}")
+
+        tree.add(record, line_number)
+
+    if tree.course is None:
+        raise HTTPException(status_code=422, detail="Import contains no course")
+    return tree
+
+
+async def _remove_partial_course(course_id: str) -> None:
+    try:
+        await run_compensation(
+            get_admin_supabase().table("courses").delete().eq("id", course_id),
+            COMPENSATION_TIMEOUT_SECONDS
+        )
+    except Exception as e:
+        logger.error(
+            f"Removing partial course {course_id} failed, it has to be deleted by hand: {str(e)}",
+            exc_info=True
+        )
+
+
+async def write_course_tree(tree: CourseTree) -> str:
+    """Inserts the tree with one request per table and lesson batch; returns the course id"""
+    supabase = get_admin_supabase()
+    course_id = tree.course["id"]
+
+    try:
+        # A timed-out insert may still have committed, so it is cleaned up too
+        await run_query(supabase.table("courses").insert(tree.course))
+        if tree.modules:
+            await run_query(supabase.table("modules").insert(tree.modules))
+        for start in range(0, len(tree.lessons), IMPORT_BATCH_SIZE):
+            await run_query(
+                supabase.table("lessons").insert(tree.lessons[start:start + IMPORT_BATCH_SIZE])
+            )
+    except BaseException:
+        logger.error(f"Writing course tree {course_id} failed, removing partial course")
+        # Shielded: a cancelled request still gets its cleanup
+        await asyncio.shield(_remove_partial_course(course_id))
+        raise
+
+    return course_id
+
+
+def _export_record(kind: str, model, row: dict) -> str:
+    record = {"kind": kind}
+    for name in model.model_fields:
+        record[name] = row.get(to_snake(name))
+    if kind == "lesson":
+        record["content"] = row.get("content")
+    return json.dumps(record, ensure_ascii=False, default=str) + "\n"
+
+
+def export_course_tree(course: dict) -> Iterator[str]:
+    """NDJSON lines for a cached course, in the format `parse_course_tree` accepts"""
+    yield _export_record("course", CourseBase, course)
+    modules = sorted(course.get("modules") or [], key=lambda module: module.get("order_index") or 0)
+    for module in modules:
+        yield _export_record("module", ModuleBase, module)
+        lessons = sorted(module.get("lessons") or [], key=lambda lesson: lesson.get("order_index") or 0)
+        for lesson in lessons:
+            yield _export_record("lesson", LessonBase, lesson)
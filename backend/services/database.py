@@ -0,0 +1,232 @@
+"""
+Data-layer execution for Supabase queries.
+
+Every query goes through `run_query`, which runs the blocking client call off the
+event loop, bounds it by the current request's deadline, hedges idempotent reads,
+fails fast through a circuit breaker while the database is degraded and records
+the call in the query metrics.
+"""
+from fastapi import HTTPException, status
+from typing import Any, Dict, Optional
+import asyncio
+import time
+import logging
+
+import httpx
+from postgrest.exceptions import APIError
+
+from config import settings
+from constants import HEDGE_MIN_DELAY_SECONDS, HEDGE_PERCENTILE, LATENCY_WINDOW_SIZE
+from .resilience import CircuitBreaker, LatencyTracker, remaining_budget
+from .query_metrics import record_query
+
+logger = logging.getLogger(__name__)
+
+
+# endpoint origin (primary or read replica) -> circuit breaker
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def endpoint_origin(url: str) -> str:
+    parsed = httpx.URL(url)
+    return f"{parsed.scheme}://{parsed.netloc.decode()}"
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    origin = endpoint_origin(url)
+    breaker = _breakers.get(origin)
+    if breaker is None:
+        breaker = _breakers[origin] = CircuitBreaker(
+            origin,
+            failure_threshold=settings.circuit_breaker_failure_threshold,
+            reset_timeout=settings.circuit_breaker_reset_seconds,
+        )
+    return breaker
+
+
+primary_breaker = get_breaker(settings.supabase_url)
+
+
+def _breaker_for(query: Any) -> CircuitBreaker:
+    session = getattr(query, "session", None)
+    base_url = getattr(session, "base_url", None)
+    if not base_url:
+        return primary_breaker
+    return get_breaker(str(base_url))
+
+
+# SQLSTATE classes PostgREST answers with a 5xx: connection, transaction,
+# resource and internal errors. Every other class is the client's fault.
+_SERVER_ERROR_CLASSES = {
+    "08", "09", "25", "2D", "38", "39", "3B", "40", "53", "54", "55", "57", "58", "F0", "HV", "P0", "XX"
+}
+# Exceptions to the classes above that PostgREST answers with a 4xx
+_CLIENT_ERROR_CODES = {"25006", "P0001"}
+
+
+def _is_client_error(error: Exception) -> bool:
+    """
+    Whether PostgREST rejected the request with a 4xx: the database answered
+    and is healthy. 5xx responses, unknown or missing codes and anything that
+    is not an APIError count against the database.
+    """
+    if not isinstance(error, APIError) or not error.code:
+        return False
+
+    code = str(error.code)
+    if code.isdigit() and len(code) == 3:
+        # Body was not JSON (e.g. a gateway error page): code is the HTTP status
+        return 400 <= int(code) < 500
+    if code.startswith("PGRST"):
+        # PGRST0xx: database unreachable, PGRST300: JWT secret missing
+        return code[5] in "123" and code != "PGRST300"
+    if len(code) == 5:
+        return code in _CLIENT_ERROR_CODES or code[:2] not in _SERVER_ERROR_CLASSES
+    return False
+
+# query path (table or rpc) -> recent latencies, used to pick the hedging delay
+_latencies: Dict[str, LatencyTracker] = {}
+
+
+def _latency_tracker(query: Any) -> LatencyTracker:
+    key = getattr(query, "path", "")
+    tracker = _latencies.get(key)
+    if tracker is None:
+        tracker = _latencies[key] = LatencyTracker(window_size=LATENCY_WINDOW_SIZE)
+    return tracker
+
+
+def _hedge_delay(tracker: LatencyTracker) -> Optional[float]:
+    p95 = tracker.percentile(HEDGE_PERCENTILE)
+    if p95 is None:
+        return None
+    return max(p95, HEDGE_MIN_DELAY_SECONDS)
+
+
+def _consume_result(task: asyncio.Future) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+async def _execute_hedged(query: Any, timeout: float, hedge_delay: Optional[float]) -> Any:
+    """
+    Runs the query and, if it has not answered after `hedge_delay`, sends an
+    identical second request. The first successful response wins.
+    """
+    deadline = time.monotonic() + timeout
+    primary = asyncio.ensure_future(asyncio.to_thread(query.execute))
+
+    if hedge_delay is None or hedge_delay >= timeout:
+        return await asyncio.wait_for(primary, timeout)
+
+    done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+    if done:
+        return primary.result()
+
+    logger.debug(f"Hedging slow read on {getattr(query, 'path', '?')} after {hedge_delay:.3f}s")
+    pending = {primary, asyncio.ensure_future(asyncio.to_thread(query.execute))}
+    error: Optional[BaseException] = None
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=deadline - time.monotonic(),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                raise asyncio.TimeoutError()
+
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+
+        raise error
+    finally:
+        for task in pending:
+            task.add_done_callback(_consume_result)
+            task.cancel()
+
+
+async def run_query(query: Any, *, idempotent: bool = False) -> Any:
+    """
+    Executes a postgrest query builder within the request deadline.
+
+    Set `idempotent=True` for reads: they are hedged once they run past the
+    p95 latency of the same table. Writes are never sent twice.
+    """
+    timeout = remaining_budget(settings.request_deadline_seconds)
+    if timeout <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Database operation timed out"
+        )
+
+    breaker = _breaker_for(query)
+    if not breaker.allow_request():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database temporarily unavailable",
+            headers={"Retry-After": str(int(breaker.reset_timeout))}
+        )
+
+    tracker = _latency_tracker(query)
+    started = time.monotonic()
+    response = None
+    failed = True
+
+    try:
+        if idempotent:
+            response = await _execute_hedged(query, timeout, _hedge_delay(tracker))
+        else:
+            response = await asyncio.wait_for(asyncio.to_thread(query.execute), timeout)
+        failed = False
+    except (asyncio.TimeoutError, httpx.TimeoutException):
+        breaker.record_failure()
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Database operation timed out"
+        )
+    except httpx.TransportError as e:
+        breaker.record_failure()
+        logger.error(f"Database connection failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database temporarily unavailable"
+        )
+    except Exception as e:
+        if _is_client_error(e):
+            # The database answered (e.g. constraint violation), so it is healthy
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        raise
+    except BaseException:
+        # Cancelled (client gone, outer deadline): says nothing about the database
+        breaker.release_trial()
+        raise
+    finally:
+        record_query(query, (time.monotonic() - started) * 1000, response, failed)
+
+    breaker.record_success()
+    tracker.observe(time.monotonic() - started)
+    return response
+
+
+async def run_compensation(query: Any, timeout: float) -> Any:
+    """
+    Executes a compensating write (undoing part of a failed operation) with its
+    own `timeout`, outside the request deadline and the circuit breaker: the
+    request failing because its budget ran out or the breaker opened is exactly
+    when the cleanup has to be attempted anyway.
+    """
+    started = time.monotonic()
+    response = None
+    failed = True
+    try:
+        response = await asyncio.wait_for(asyncio.to_thread(query.execute), timeout)
+        failed = False
+        return response
+    finally:
+        record_query(query, (time.monotonic() - started) * 1000, response, failed)
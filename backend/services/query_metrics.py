@@ -0,0 +1,152 @@
+"""
+Per-query instrumentation for the data layer.
+
+`run_query` reports every call here. Calls are aggregated per
+(table, operation, route) and calls slower than SLOW_QUERY_THRESHOLD_MS are
+logged together with the route that issued them.
+
+Payload sizes are measured by serializing the result again, so only every
+QUERY_PAYLOAD_SAMPLE_EVERY-th call per aggregate is measured and
+`payload_bytes` is extrapolated from those samples.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import json
+import logging
+
+from config import settings
+from constants import QUERY_PAYLOAD_SAMPLE_EVERY
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("slow_query")
+
+
+_request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+
+@contextmanager
+def track_request(scope: dict) -> Iterator[None]:
+    """
+    Binds the ASGI scope of the request being served. The router fills in
+    `scope["route"]` once the request is matched, so queries issued by the
+    handler can be attributed to it.
+    """
+    token = _request_scope.set(scope)
+    try:
+        yield
+    finally:
+        _request_scope.reset(token)
+
+
+def current_route() -> Tuple[str, str]:
+    """Returns (router, route) of the request being served"""
+    scope = _request_scope.get()
+    if scope is None:
+        return "background", "-"
+
+    route = scope.get("route")
+    endpoint = scope.get("endpoint")
+    router = endpoint.__module__.rsplit(".", 1)[-1] if endpoint else "-"
+    path = getattr(route, "path", scope.get("path", "-"))
+    return router, f"{scope.get('method', '')} {path}"
+
+
+def describe_query(query: Any) -> Tuple[str, str]:
+    """Returns (table, operation) for a postgrest query builder"""
+    path = getattr(query, "path", "").lstrip("/")
+    method = getattr(query, "http_method", "GET")
+
+    if path.startswith("rpc/"):
+        return path[len("rpc/"):], "rpc"
+
+    headers = getattr(query, "headers", None) or {}
+    if method == "POST" and "merge-duplicates" in headers.get("Prefer", ""):
+        return path, "upsert"
+
+    operation = {
+        "GET": "select",
+        "HEAD": "count",
+        "POST": "insert",
+        "PATCH": "update",
+        "DELETE": "delete",
+    }.get(method, method.lower())
+    return path, operation
+
+
+def payload_size(data: Any) -> int:
+    if data is None:
+        return 0
+    return len(json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str).encode())
+
+
+@dataclass
+class QueryStats:
+    table: str
+    operation: str
+    router: str
+    route: str
+    calls: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    payload_bytes: int = 0
+    slow_calls: int = 0
+    sampled_calls: int = 0
+    sampled_bytes: int = 0
+
+
+_stats: Dict[Tuple[str, str, str], QueryStats] = {}
+
+
+def record_query(query: Any, duration_ms: float, response: Any = None, failed: bool = False) -> None:
+    table, operation = describe_query(query)
+    router, route = current_route()
+
+    stats = _stats.get((table, operation, route))
+    if stats is None:
+        stats = _stats[(table, operation, route)] = QueryStats(table, operation, router, route)
+
+    data = getattr(response, "data", None)
+    rows = len(data) if isinstance(data, list) else int(data is not None)
+    size = None
+    if stats.calls % QUERY_PAYLOAD_SAMPLE_EVERY == 0:
+        size = payload_size(data)
+        stats.sampled_calls += 1
+        stats.sampled_bytes += size
+
+    stats.calls += 1
+    stats.errors += int(failed)
+    stats.total_ms += duration_ms
+    stats.max_ms = max(stats.max_ms, duration_ms)
+    stats.rows += rows
+    stats.payload_bytes = stats.sampled_bytes * stats.calls // stats.sampled_calls
+
+    if duration_ms >= settings.slow_query_threshold_ms:
+        stats.slow_calls += 1
+        if size is None:
+            # Slow calls are rare and their size is what the log is for
+            size = payload_size(data)
+        params = getattr(query, "params", None)
+        columns = params.get("select") if params is not None else None
+        slow_query_logger.warning(
+            f"Slow query {duration_ms:.0f}ms on {route} ({router}): "
+            f"{operation} {table} select={columns!r} rows={rows} bytes={size}"
+            f"{' FAILED' if failed else ''}"
+        )
+
+
+def get_query_stats() -> List[Dict[str, Any]]:
+    """Aggregates sorted by total time spent, most expensive first"""
+    snapshot = []
+    for stats in _stats.values():
+        entry = asdict(stats)
+        entry["avg_ms"] = stats.total_ms / stats.calls if stats.calls else 0.0
+        snapshot.append(entry)
+    return sorted(snapshot, key=lambda entry: entry["total_ms"], reverse=True)
+
+
+def reset_query_stats() -> None:
+    _stats.clear()
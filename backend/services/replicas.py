@@ -0,0 +1,111 @@
+"""
+Read replica routing.
+
+Read-only handlers get their client from `get_read_supabase`, which spreads
+reads round-robin over the healthy replicas in SUPABASE_REPLICA_URLS. Writes keep
+using the primary, and so do reads from a caller that wrote within the last
+READ_YOUR_WRITES_SECONDS, so nobody reads their own write from a lagging replica.
+"""
+from supabase import Client
+from typing import List, Optional
+import asyncio
+import itertools
+import logging
+
+import httpx
+
+from config import settings
+from constants import READ_YOUR_WRITES_MAX_CALLERS, REPLICA_HEALTH_TIMEOUT_SECONDS
+from supabase_client import create_supabase, get_admin_key
+from utils.cache import TTLCache
+from .database import get_breaker
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaPool:
+    def __init__(self, urls: List[str]):
+        self.urls = urls
+        self._next = itertools.cycle(range(len(urls))) if urls else None
+        # callers (access tokens) that wrote recently and must read from the primary
+        self._pinned = TTLCache(
+            max_size=READ_YOUR_WRITES_MAX_CALLERS,
+            ttl_seconds=settings.read_your_writes_seconds
+        )
+        self._health_task: Optional[asyncio.Task] = None
+
+    def choose(self, caller: Optional[str] = None) -> Optional[str]:
+        """Returns a healthy replica URL, or None when the read should go to the primary"""
+        if not self._next:
+            return None
+        if caller and self._pinned.get(caller):
+            return None
+
+        for _ in range(len(self.urls)):
+            url = self.urls[next(self._next)]
+            if get_breaker(url).is_available():
+                return url
+        return None
+
+    def pin_to_primary(self, caller: Optional[str]) -> None:
+        if caller and self.urls:
+            self._pinned.set(caller, True)
+
+    async def check_health(self) -> None:
+        async with httpx.AsyncClient(timeout=REPLICA_HEALTH_TIMEOUT_SECONDS) as client:
+            for url in self.urls:
+                breaker = get_breaker(url)
+                try:
+                    response = await client.get(
+                        f"{url.rstrip('/')}/rest/v1/",
+                        headers={"apikey": settings.supabase_anon_key}
+                    )
+                    healthy = response.status_code < 500
+                except httpx.HTTPError:
+                    healthy = False
+
+                if healthy:
+                    breaker.record_success()
+                else:
+                    logger.warning(f"Read replica {url} failed health check")
+                    breaker.record_failure()
+
+    async def _health_loop(self) -> None:
+        while True:
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.error(f"Replica health check failed: {str(e)}", exc_info=True)
+            await asyncio.sleep(settings.replica_health_check_seconds)
+
+    def start_health_checks(self) -> None:
+        if self.urls and self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def stop_health_checks(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+
+replica_pool = ReplicaPool(settings.replica_urls_list)
+
+
+def get_read_supabase(admin: bool = False, caller: Optional[str] = None) -> Client:
+    """
+    Creates a NEW client for read-only queries, pointed at a healthy replica when
+    one is configured. `caller` (the access token) keeps read-your-writes reads
+    on the primary. Auth calls must still use the primary client.
+    """
+    key = get_admin_key() if admin else settings.supabase_anon_key
+    url = replica_pool.choose(caller) or settings.supabase_url
+    return create_supabase(url, key)
+
+
+def mark_write(caller: Optional[str]) -> None:
+    """Sends the caller's reads to the primary for READ_YOUR_WRITES_SECONDS"""
+    replica_pool.pin_to_primary(caller)
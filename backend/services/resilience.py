@@ -0,0 +1,123 @@
+"""Request deadlines, latency tracking and circuit breaking for backend calls"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections import deque
+from typing import Iterator, Optional
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+_request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(budget_seconds: float) -> Iterator[float]:
+    """Sets the deadline (monotonic clock) for everything done inside the block"""
+    deadline = time.monotonic() + budget_seconds
+    current = _request_deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+
+    token = _request_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _request_deadline.reset(token)
+
+
+def remaining_budget(default: float) -> float:
+    """
+    Seconds left before the current request's deadline.
+    Falls back to `default` when no deadline is set (e.g. background tasks).
+    """
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return default
+    return deadline - time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling window of call durations used to pick the hedging delay"""
+
+    def __init__(self, window_size: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=window_size)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed    - calls go through, failures are counted
+    open      - calls are rejected until `reset_timeout` has passed
+    half_open - a single trial call is let through; its outcome closes or reopens the circuit
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def is_available(self) -> bool:
+        """Whether a call would currently be let through, without claiming the trial slot"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return time.monotonic() - self._opened_at >= self.reset_timeout
+        return not self._trial_in_flight
+
+    def allow_request(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def release_trial(self) -> None:
+        """Gives the trial slot back when a call ends without an outcome (e.g. it was cancelled)"""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+        self.state = self.CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_in_flight = False
+
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit '{self.name}' opened after {self._failures} failures")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
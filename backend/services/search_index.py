@@ -0,0 +1,270 @@
+"""
+In-process full-text index over the published catalog.
+
+Titles and descriptions of published courses and their lessons are split
+into normalized terms (lowercase, no diacritics) and kept in an inverted
+index: term -> {document id: weight}. Title terms weigh more than
+description terms. Every query term matches as a prefix, using a sorted
+array of all terms, so results keep up with the user typing. The same
+array backs title autocomplete (`suggest`).
+
+The index follows the catalog: `sync` compares the published ETag and only
+re-indexes courses whose ETag changed, so admin writes (which refresh the
+catalog write-through) are picked up on the next search.
+"""
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import bisect
+import heapq
+import logging
+import re
+import unicodedata
+
+from constants import SEARCH_COURSE_LIMIT, SEARCH_LESSON_LIMIT, SEARCH_TITLE_WEIGHT
+from models import SearchResult, SearchSuggestion
+from .catalog import course_catalog
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+# Letters NFKD does not decompose
+_LETTERS = str.maketrans({"ł": "l", "đ": "d", "ø": "o", "ß": "ss"})
+
+# Prefix matches count less than whole-term matches
+PREFIX_MATCH_FACTOR = 0.5
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase text without diacritics and with collapsed whitespace"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold().translate(_LETTERS))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.split())
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _WORD.findall(normalize_text(text)) if text else []
+
+
+class _Document:
+    __slots__ = ("result", "order", "title_key")
+
+    def __init__(self, result: SearchResult, order: tuple):
+        self.result = result
+        self.order = order
+        self.title_key = normalize_text(result.title)
+
+
+class SearchIndex:
+    def __init__(self):
+        # term -> document id -> weight
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._documents: Dict[str, _Document] = {}
+        # course id -> (course etag, ids of its documents)
+        self._courses: Dict[str, Tuple[str, List[str]]] = {}
+        # all terms, sorted for prefix lookups; rebuilt lazily after a change
+        self._terms: Optional[List[str]] = None
+        self._etag: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def _add(self, doc_id: str, document: _Document) -> None:
+        self._documents[doc_id] = document
+        result = document.result
+        weights: Dict[str, float] = {}
+        for term in tokenize(result.description):
+            weights[term] = 1.0
+        for term in tokenize(result.title):
+            weights[term] = SEARCH_TITLE_WEIGHT
+        for term, weight in weights.items():
+            self._postings.setdefault(term, {})[doc_id] = weight
+
+    def _remove(self, doc_id: str) -> None:
+        document = self._documents.pop(doc_id)
+        result = document.result
+        for term in set(tokenize(result.title)) | set(tokenize(result.description)):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                self._terms = None
+
+    def _index_course(self, course: dict, etag: str) -> None:
+        self._remove_course(course["id"])
+
+        course_order = (course.get("order_index") or 0, course["id"])
+        doc_ids = [course["id"]]
+        self._add(course["id"], _Document(
+            SearchResult(
+                type="course",
+                id=course["id"],
+                title=course["title"],
+                description=course.get("description"),
+            ),
+            course_order
+        ))
+        for module in course.get("modules") or []:
+            for lesson in module.get("lessons") or []:
+                doc_ids.append(lesson["id"])
+                self._add(lesson["id"], _Document(
+                    SearchResult(
+                        type="lesson",
+                        id=lesson["id"],
+                        title=lesson["title"],
+                        description=lesson.get("description"),
+                        course_name=course.get("title"),
+                        module_name=module.get("title"),
+                    ),
+                    course_order + (module.get("order_index") or 0, lesson.get("order_index") or 0)
+                ))
+        self._courses[course["id"]] = (etag, doc_ids)
+        self._terms = None
+
+    def _remove_course(self, course_id: str) -> None:
+        indexed = self._courses.pop(course_id, None)
+        if indexed is None:
+            return
+        for doc_id in indexed[1]:
+            self._remove(doc_id)
+
+    async def sync(self) -> None:
+        """Re-indexes the published courses that changed since the last sync"""
+        published_etag = await course_catalog.published_etag()
+        if published_etag == self._etag:
+            return
+
+        async with self._lock:
+            courses = await course_catalog.get_published_courses()
+            published_etag = await course_catalog.published_etag()
+            if published_etag == self._etag:
+                return
+
+            changed = 0
+            published = set()
+            for course in courses:
+                published.add(course["id"])
+                etag = course_catalog.cached_course_etag(course["id"])
+                indexed = self._courses.get(course["id"])
+                if indexed is None or indexed[0] != etag:
+                    self._index_course(course, etag)
+                    changed += 1
+            for course_id in self._courses.keys() - published:
+                self._remove_course(course_id)
+                changed += 1
+
+            self._etag = published_etag
+            logger.info(
+                f"Search index: {changed} courses re-indexed, "
+                f"{len(self._documents)} documents, {len(self._postings)} terms"
+            )
+
+    def _matching_terms(self, prefix: str) -> List[str]:
+        if self._terms is None:
+            self._terms = sorted(self._postings)
+        start = bisect.bisect_left(self._terms, prefix)
+        end = bisect.bisect_left(self._terms, prefix + "\uffff", lo=start)
+        return self._terms[start:end]
+
+    def _scores(self, tokens: List[str]) -> Dict[str, float]:
+        """Document id -> score for documents matching every token"""
+        scores: Optional[Dict[str, float]] = None
+        for token in tokens:
+            token_scores: Dict[str, float] = {}
+            for term in self._matching_terms(token):
+                factor = 1.0 if term == token else PREFIX_MATCH_FACTOR
+                for doc_id, weight in self._postings[term].items():
+                    score = weight * factor
+                    if score > token_scores.get(doc_id, 0.0):
+                        token_scores[doc_id] = score
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    doc_id: score + token_scores[doc_id]
+                    for doc_id, score in scores.items() if doc_id in token_scores
+                }
+            if not scores:
+                break
+        return scores or {}
+
+    def _title_matches(self, prefix: str) -> Set[str]:
+        """Ids of documents with a title term starting with `prefix`"""
+        matches = set()
+        for term in self._matching_terms(prefix):
+            matches.update(
+                doc_id for doc_id, weight in self._postings[term].items()
+                if weight == SEARCH_TITLE_WEIGHT
+            )
+        return matches
+
+    async def suggest(self, query: str, limit: int) -> List[SearchSuggestion]:
+        """
+        Titles in which every word of `query` starts a word. Titles that start
+        with the whole query come first, the rest keep catalog order.
+        """
+        await self.sync()
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        candidates = self._title_matches(tokens[0])
+        for token in tokens[1:]:
+            if not candidates:
+                break
+            candidates &= self._title_matches(token)
+
+        prefix = " ".join(tokens)
+        best = heapq.nsmallest(
+            limit,
+            (self._documents[doc_id] for doc_id in candidates),
+            key=lambda document: (not document.title_key.startswith(prefix), document.order)
+        )
+        return [
+            SearchSuggestion(type=document.result.type, id=document.result.id, title=document.result.title)
+            for document in best
+        ]
+
+    async def search(self, query: str) -> List[SearchResult]:
+        """Best courses first, then best lessons; ties keep catalog order"""
+        await self.sync()
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        ranked = sorted(
+            self._scores(tokens).items(),
+            key=lambda item: (-item[1], self._documents[item[0]].order)
+        )
+        courses, lessons = [], []
+        for doc_id, _ in ranked:
+            result = self._documents[doc_id].result
+            if result.type == "course" and len(courses) < SEARCH_COURSE_LIMIT:
+                courses.append(result)
+            elif result.type == "lesson" and len(lessons) < SEARCH_LESSON_LIMIT:
+                lessons.append(result)
+        return courses + lessons
+
+    def start(self) -> None:
+        """Builds the index in the background as soon as the catalog is loaded"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._build())
+
+    async def _build(self) -> None:
+        try:
+            await self.sync()
+        except Exception as e:
+            logger.error(f"Building the search index failed: {str(e)}", exc_info=True)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+search_index = SearchIndex()
@@ -1,4 +1,4 @@
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 from config import settings
 from typing import Optional
 import logging
@@ -9,32 +9,38 @@ logger = logging.getLogger(__name__)
 # IMPORTANT: Create new client instances per request to avoid session leaking
 # between different users. Each client should be isolated.
 
+def _client_options() -> ClientOptions:
+    # Stop blocked HTTP calls once no request could still be waiting for them
+    return ClientOptions(postgrest_client_timeout=settings.request_deadline_seconds)
+
+
+def create_supabase(url: str, key: str) -> Client:
+    """Creates a NEW Supabase client for the given endpoint (primary or read replica)"""
+    return create_client(url, key, options=_client_options())
+
+
 def get_supabase() -> Client:
     """
     Creates a NEW Supabase client instance for each request.
     This prevents session state from being shared between different users.
     """
-    return create_client(
-        settings.supabase_url,
-        settings.supabase_anon_key
-    )
+    return create_supabase(settings.supabase_url, settings.supabase_anon_key)
 
 
-def get_admin_supabase() -> Client:
-    """
-    Creates a NEW Supabase admin client instance for each request.
-    Uses service key for elevated permissions.
-    """
-    key = settings.supabase_service_key or settings.supabase_anon_key
-    
+def get_admin_key() -> str:
     if not settings.supabase_service_key:
         logger.warning(
             "SUPABASE_SERVICE_KEY not set, using anonymous key for admin client. "
             "This may result in permission issues."
         )
     
-    return create_client(
-        settings.supabase_url,
-        key
-    )
+    return settings.supabase_service_key or settings.supabase_anon_key
+
+
+def get_admin_supabase() -> Client:
+    """
+    Creates a NEW Supabase admin client instance for each request.
+    Uses service key for elevated permissions.
+    """
+    return create_supabase(settings.supabase_url, get_admin_key())
 
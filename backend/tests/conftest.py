@@ -0,0 +1,12 @@
+"""
+Backend tests run without a Supabase project: settings get placeholder
+values, and tests hand the data layer query objects of their own.
+
+    cd backend && pip install -r requirements-dev.txt && python -m pytest
+"""
+import os
+
+os.environ.setdefault("SUPABASE_URL", "https://test.supabase.co")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("JWT_SECRET", "test-secret-of-at-least-32-characters")
+os.environ.setdefault("ENVIRONMENT", "testing")
@@ -0,0 +1,122 @@
+import asyncio
+import time
+from typing import Callable, List, Optional, Tuple
+
+import pytest
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+import services.course_tree as course_tree
+from services.course_tree import CourseTree, write_course_tree
+from services.database import primary_breaker
+from services.resilience import request_deadline
+
+
+class FakeQuery:
+    http_method = "POST"
+
+    def __init__(self, client: "FakeClient", table: str, operation: str):
+        self.client = client
+        self.path = f"/{table}"
+        self.table = table
+        self.operation = operation
+
+    def eq(self, column: str, value: str) -> "FakeQuery":
+        return self
+
+    def execute(self):
+        self.client.calls.append((self.table, self.operation))
+        if self.client.on_execute is not None:
+            self.client.on_execute(self.table, self.operation)
+        return type("Response", (), {"data": [{}], "count": None})()
+
+
+class FakeClient:
+    """Admin client stand-in: records (table, operation) per executed query"""
+
+    def __init__(self, on_execute: Optional[Callable[[str, str], None]] = None):
+        self.calls: List[Tuple[str, str]] = []
+        self.on_execute = on_execute
+
+    def table(self, name: str) -> "FakeTable":
+        return FakeTable(self, name)
+
+
+class FakeTable:
+    def __init__(self, client: FakeClient, name: str):
+        self.client = client
+        self.name = name
+
+    def insert(self, rows) -> FakeQuery:
+        return FakeQuery(self.client, self.name, "insert")
+
+    def delete(self) -> FakeQuery:
+        return FakeQuery(self.client, self.name, "delete")
+
+
+def make_tree(lessons: int) -> CourseTree:
+    tree = CourseTree()
+    tree.course = {"id": "course", "title": "Kurs", "is_published": True}
+    tree.modules = [{"id": "module", "course_id": "course", "title": "Moduł"}]
+    tree.lessons = [{"id": f"lesson-{index}", "module_id": "module"} for index in range(lessons)]
+    return tree
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def install(on_execute=None) -> FakeClient:
+        fake = FakeClient(on_execute)
+        monkeypatch.setattr(course_tree, "get_admin_supabase", lambda: fake)
+        return fake
+
+    yield install
+    primary_breaker.record_success()
+
+
+def test_partial_course_is_removed_when_the_deadline_runs_out_mid_write(client):
+    def slow_lessons(table: str, operation: str) -> None:
+        if table == "lessons":
+            time.sleep(0.3)
+
+    fake = client(slow_lessons)
+
+    async def write() -> None:
+        with request_deadline(0.1):
+            await write_course_tree(make_tree(lessons=3))
+
+    with pytest.raises(HTTPException) as failed:
+        asyncio.run(write())
+
+    assert failed.value.status_code == 504
+    assert fake.calls[-1] == ("courses", "delete")
+
+
+def test_partial_course_is_removed_while_the_breaker_is_open(client):
+    def failing_lessons(table: str, operation: str) -> None:
+        if table == "lessons":
+            for _ in range(primary_breaker.failure_threshold):
+                primary_breaker.record_failure()
+            raise APIError({"message": "Service unavailable", "code": 503})
+
+    fake = client(failing_lessons)
+
+    with pytest.raises(APIError):
+        asyncio.run(write_course_tree(make_tree(lessons=3)))
+
+    assert primary_breaker.state == primary_breaker.OPEN
+    assert fake.calls[-1] == ("courses", "delete")
+
+
+def test_failed_cleanup_does_not_hide_the_original_error(client):
+    def failing(table: str, operation: str) -> None:
+        if table == "lessons":
+            raise APIError({"message": "Service unavailable", "code": 503})
+        if operation == "delete":
+            raise RuntimeError("connection reset")
+
+    fake = client(failing)
+
+    with pytest.raises(APIError):
+        asyncio.run(write_course_tree(make_tree(lessons=3)))
+
+    assert fake.calls[-1] == ("courses", "delete")
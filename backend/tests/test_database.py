@@ -0,0 +1,66 @@
+import asyncio
+import itertools
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+from services.database import get_breaker, run_query
+
+_origins = itertools.count()
+
+
+class FakeQuery:
+    """Stands in for a postgrest query builder; every execute() raises `error`"""
+
+    path = "/courses"
+    http_method = "GET"
+
+    def __init__(self, error: Exception):
+        # A fresh origin per query, so each test gets its own circuit breaker
+        self.session = SimpleNamespace(base_url=f"https://db{next(_origins)}.test")
+        self.error = error
+
+    def execute(self):
+        raise self.error
+
+    @property
+    def breaker(self):
+        return get_breaker(self.session.base_url)
+
+
+def run_until_rejected(query: FakeQuery, attempts: int) -> None:
+    for _ in range(attempts):
+        with pytest.raises(Exception):
+            asyncio.run(run_query(query))
+
+
+@pytest.mark.parametrize("error", [
+    APIError({"message": "JSON could not be generated", "code": 502}),
+    APIError({"message": "Could not connect", "code": "PGRST001"}),
+    APIError({"message": "canceling statement due to statement timeout", "code": "57014"}),
+    APIError({"message": "something went wrong"}),
+    ValueError("Expecting value: line 1 column 1 (char 0)"),
+])
+def test_server_errors_open_the_breaker(error):
+    query = FakeQuery(error)
+    run_until_rejected(query, query.breaker.failure_threshold)
+
+    assert query.breaker.state == query.breaker.OPEN
+    with pytest.raises(HTTPException) as rejected:
+        asyncio.run(run_query(query))
+    assert rejected.value.status_code == 503
+
+
+@pytest.mark.parametrize("error", [
+    APIError({"message": "duplicate key value violates unique constraint", "code": "23505"}),
+    APIError({"message": "Lesson ids do not match the module", "code": "22023"}),
+    APIError({"message": "JSON object requested, multiple (or no) rows returned", "code": "PGRST116"}),
+    APIError({"message": "JSON could not be generated", "code": 404}),
+])
+def test_client_errors_keep_the_breaker_closed(error):
+    query = FakeQuery(error)
+    run_until_rejected(query, query.breaker.failure_threshold * 2)
+
+    assert query.breaker.state == query.breaker.CLOSED
@@ -0,0 +1,25 @@
+import pytest
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+from utils.errors import handle_supabase_error
+
+
+def test_invalid_parameter_value_is_a_bad_request():
+    error = APIError({
+        "message": "reorder_lessons: ids do not match the lessons of module 42",
+        "code": "22023",
+    })
+
+    with pytest.raises(HTTPException) as mapped:
+        handle_supabase_error(error, "Failed to reorder lessons")
+
+    assert mapped.value.status_code == 400
+    assert mapped.value.detail == error.message
+
+
+def test_unknown_errors_stay_server_errors():
+    with pytest.raises(HTTPException) as mapped:
+        handle_supabase_error(APIError({"message": "boom", "code": "XX000"}), "Failed")
+
+    assert mapped.value.status_code == 500
@@ -0,0 +1,36 @@
+from starlette.requests import Request
+
+from utils.http_cache import etag_matches, not_modified
+
+ETAG = '"abc"'
+
+
+def make_request(**headers: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def test_not_modified_echoes_the_encoded_validator():
+    request = make_request(if_none_match='"abc-gzip"', accept_encoding="gzip, br")
+
+    assert etag_matches(request, ETAG)
+    response = not_modified(request, ETAG, "no-cache")
+    assert response.status_code == 304
+    assert response.headers["ETag"] == '"abc-gzip"'
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+
+def test_not_modified_echoes_the_identity_validator():
+    request = make_request(if_none_match='W/"abc"', accept_encoding="gzip")
+
+    assert not_modified(request, ETAG, "no-cache").headers["ETag"] == ETAG
+
+
+def test_not_modified_falls_back_to_identity_when_the_encoding_is_no_longer_accepted():
+    request = make_request(if_none_match='"abc-br"', accept_encoding="gzip")
+
+    assert not_modified(request, ETAG, "no-cache").headers["ETag"] == ETAG
@@ -0,0 +1,125 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+import routers.lessons as lessons
+from models import LessonCreate, LessonUpdate
+from models.course import TheoryContent
+
+LESSON = {
+    "id": "lesson",
+    "module_id": "module",
+    "title": "Pętle",
+    "lesson_type": "quiz",
+    "language": "python",
+    "order_index": 0,
+    "content": {"type": "quiz", "question": "2 + 2?", "options": []},
+}
+
+
+class FakeQuery:
+    path = "/lessons"
+
+    def __init__(self, client: "FakeClient", operation: str, payload: Optional[Dict[str, Any]] = None):
+        self.client = client
+        self.operation = operation
+        self.payload = payload
+        self.http_method = "GET" if operation == "select" else "PATCH"
+
+    def eq(self, column: str, value: str) -> "FakeQuery":
+        return self
+
+    def execute(self):
+        self.client.calls.append(self.operation)
+        if self.operation == "update":
+            self.client.written = self.payload
+            data = [{**LESSON, **self.payload}]
+        else:
+            data = [{"lesson_type": LESSON["lesson_type"]}]
+        return type("Response", (), {"data": data, "count": None})()
+
+
+class FakeClient:
+    """Admin client stand-in for the lessons table"""
+
+    def __init__(self):
+        self.calls: List[str] = []
+        self.written: Optional[Dict[str, Any]] = None
+
+    def table(self, name: str) -> "FakeClient":
+        return self
+
+    def select(self, columns: str) -> FakeQuery:
+        return FakeQuery(self, "select")
+
+    def update(self, payload: Dict[str, Any]) -> FakeQuery:
+        return FakeQuery(self, "update", payload)
+
+
+@pytest.fixture
+def client(monkeypatch) -> FakeClient:
+    async def invalidate_module(module_id: str) -> None:
+        pass
+
+    fake = FakeClient()
+    monkeypatch.setattr(lessons, "get_admin_supabase", lambda: fake)
+    monkeypatch.setattr(lessons, "mark_write", lambda token: None)
+    monkeypatch.setattr(lessons.course_catalog, "invalidate_module", invalidate_module)
+    return fake
+
+
+def update(body: Dict[str, Any]):
+    return asyncio.run(lessons.update_lesson("lesson", LessonUpdate(**body), user=None, token="token"))
+
+
+@pytest.mark.parametrize("model", [LessonCreate, LessonUpdate])
+def test_content_type_must_match_lesson_type(model):
+    body = {
+        "module_id": "module",
+        "title": "Pętle",
+        "lessonType": "theory",
+        "language": "python",
+        "content": {"type": "quiz", "question": "2 + 2?", "options": []},
+    }
+
+    with pytest.raises(ValidationError, match="does not match lessonType"):
+        model(**body)
+
+
+def test_untyped_content_takes_the_type_of_the_lesson_type():
+    lesson = LessonUpdate(lessonType="theory", content={"content": "Pętla for"})
+
+    assert isinstance(lesson.content, TheoryContent)
+
+
+def test_untyped_content_is_validated_against_the_stored_lesson_type(client):
+    update({"content": {"question": "2 + 3?", "options": []}})
+
+    assert client.calls == ["select", "update"]
+    assert client.written["content"]["type"] == "quiz"
+
+
+def test_untyped_content_of_another_type_is_rejected(client):
+    with pytest.raises(HTTPException) as rejected:
+        update({"content": {"content": "Pętla for"}})
+
+    assert rejected.value.status_code == 422
+    assert client.calls == ["select"]
+
+
+def test_typed_content_of_another_type_than_the_stored_lesson_is_rejected(client):
+    with pytest.raises(HTTPException) as rejected:
+        update({"content": {"type": "theory", "content": "Pętla for"}})
+
+    assert rejected.value.status_code == 422
+    assert client.written is None
+
+
+def test_update_with_lesson_type_does_not_read_the_stored_type(client):
+    update({"lessonType": "quiz", "content": {"question": "2 + 3?", "options": []}})
+
+    assert client.calls == ["update"]
+    assert client.written["content"]["type"] == "quiz"
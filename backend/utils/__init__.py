@@ -1,13 +1,32 @@
-from .dependencies import get_access_token, get_current_user, require_admin
+from .dependencies import (
+    get_access_token,
+    get_current_user,
+    require_admin,
+    get_user_role,
+)
 from .errors import handle_supabase_error, create_success_response, create_error_response
 from .security import create_auth_response
+from .http_cache import combine_etags, content_etag, etag_matches, not_modified, set_cache_headers
+from .pagination import encode_cursor, decode_cursor, set_next_page
+from .compression import compress, encoded_response
 
 __all__ = [
     "get_access_token",
     "get_current_user",
     "require_admin",
+    "get_user_role",
     "handle_supabase_error",
     "create_success_response",
     "create_error_response",
     "create_auth_response",
+    "combine_etags",
+    "content_etag",
+    "etag_matches",
+    "not_modified",
+    "set_cache_headers",
+    "encode_cursor",
+    "decode_cursor",
+    "set_next_page",
+    "compress",
+    "encoded_response",
 ]
@@ -0,0 +1,96 @@
+"""
+Content-Encoding negotiation for cached payloads.
+
+Cached bodies are compressed once per version, in a worker thread (the
+cost is paid on the first request only, at a mid level since that request
+waits for it); responses built per request go through GZipMiddleware
+instead, wrapped in EncodedETagMiddleware so their ETag names the
+compressed body. Brotli is
+used when the optional `brotli` package is installed.
+"""
+from fastapi import Request, Response
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Awaitable, Callable, Optional
+import gzip
+
+from constants import BROTLI_QUALITY, COMPRESSION_MIN_BYTES, GZIP_LEVEL
+from .http_cache import _strip_encoding, accepted_encodings, encoded_etag
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# In order of preference
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(request: Request, size: int) -> Optional[str]:
+    """Best encoding the client accepts, or None for small bodies and identity-only clients"""
+    if size < COMPRESSION_MIN_BYTES:
+        return None
+
+    accepted = accepted_encodings(request)
+    for encoding in SUPPORTED_ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+async def encoded_response(
+    request: Request,
+    body: bytes,
+    encode: Callable[[str], Awaitable[bytes]],
+    etag: str,
+    cache_control: str
+) -> Response:
+    """
+    JSON response in the negotiated encoding. `body` is the identity JSON;
+    `encode(encoding)` returns it compressed and should memoize the result.
+    """
+    encoding = negotiate_encoding(request, len(body))
+    content = await encode(encoding) if encoding else body
+    response = Response(content=content, media_type="application/json")
+    response.headers["ETag"] = encoded_etag(etag, encoding)
+    response.headers["Cache-Control"] = cache_control
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if len(body) >= COMPRESSION_MIN_BYTES:
+        response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+class EncodedETagMiddleware:
+    """
+    Goes outside GZipMiddleware. Responses it compresses keep the identity
+    ETag, so one strong validator would name two different bodies; they get
+    the encoded ETag instead (precompressed responses already have one).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_etag(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                encoding = headers.get("content-encoding")
+                etag = headers.get("etag")
+                if encoding and etag and not etag.startswith("W/") and _strip_encoding(etag) == etag:
+                    headers["ETag"] = encoded_etag(etag, encoding)
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
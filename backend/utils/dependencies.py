@@ -1,11 +1,19 @@
 from fastapi import Header, HTTPException, Depends, status
 from supabase import Client
 from supabase_client import get_supabase
+from services.database import run_query
+from constants import ADMIN_ROLES, ROLE_CACHE_MAX_SIZE, ROLE_CACHE_TTL_SECONDS
+from .cache import TTLCache
 from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# user id -> profile role, shared by require_admin and /auth/check_admin.
+# Roles are only changed outside the API (Supabase dashboard), so expiry is the
+# only invalidation: a role change applies within ROLE_CACHE_TTL_SECONDS.
+role_cache = TTLCache(max_size=ROLE_CACHE_MAX_SIZE, ttl_seconds=ROLE_CACHE_TTL_SECONDS)
+
 
 async def get_access_token(authorization: Optional[str] = Header(None)) -> str:
     if not authorization:
@@ -59,6 +67,31 @@ async def get_current_user(token: str = Depends(get_access_token)):
         )
 
 
+async def get_user_role(supabase: Client, user_id: str) -> Optional[str]:
+    """
+    Returns the profile role for a user, served from the role cache when possible.
+    Returns None when the user has no profile yet (not cached, so a profile
+    created later is picked up on the next call).
+    """
+    role = role_cache.get(user_id)
+    if role is not None:
+        return role
+
+    profile_response = await run_query(
+        supabase.table("profiles")
+        .select("role")
+        .eq("id", user_id),
+        idempotent=True
+    )
+
+    if not profile_response.data:
+        return None
+
+    role = profile_response.data[0].get("role") or ""
+    role_cache.set(user_id, role)
+    return role
+
+
 async def require_admin(token: str = Depends(get_access_token)):
     supabase = get_supabase()
     
@@ -73,22 +106,15 @@ async def require_admin(token: str = Depends(get_access_token)):
         
         user_id = user_response.user.id
         
-        profile_response = supabase.table("profiles")\
-            .select("role")\
-            .eq("id", user_id)\
-            .execute()
+        role = await get_user_role(supabase, user_id)
         
-        if not profile_response.data:
+        if role is None:
             logger.warning(f"Profile not found for user {user_id}")
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Admin access required"
             )
         
-        role = profile_response.data[0].get("role", "")
-        
-        from constants import ADMIN_ROLES
-        
         if role not in ADMIN_ROLES:
             logger.warning(f"User {user_id} attempted admin access with role: {role}")
             raise HTTPException(
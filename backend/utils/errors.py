@@ -33,11 +33,22 @@ def handle_supabase_error(
     e: Exception,
     default_message: str = "Database operation failed"
 ) -> None:
+    # Already mapped (e.g. deadline or circuit breaker responses from the data layer)
+    if isinstance(e, HTTPException):
+        raise e
+    
     error_msg = str(e).lower()
     
     logger.error(f"Supabase error: {str(e)}", exc_info=True)
     
-    if "duplicate key" in error_msg or "unique constraint" in error_msg:
+    # invalid_parameter_value: raised by our RPCs (e.g. migrations/002_bulk_reorder.sql)
+    # when the arguments do not fit the data; the message is written for the client
+    if getattr(e, "code", None) == "22023":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=getattr(e, "message", None) or "Invalid parameter value"
+        )
+    elif "duplicate key" in error_msg or "unique constraint" in error_msg:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Resource already exists. Please check for duplicates."
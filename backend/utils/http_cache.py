@@ -0,0 +1,107 @@
+"""HTTP caching helpers: strong ETags and conditional GET"""
+from collections.abc import Mapping
+from fastapi import Request, Response
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+
+
+def _json_default(value: Any) -> Any:
+    # Mappings that are not dicts (compact catalog rows) hash like the dict they replace
+    if isinstance(value, Mapping):
+        return dict(value)
+    return str(value)
+
+
+def content_etag(data: Any) -> str:
+    """Strong ETag derived from the JSON content of `data`"""
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), default=_json_default).encode()
+    return f'"{hashlib.sha256(encoded).hexdigest()[:32]}"'
+
+
+def combine_etags(*etags: str) -> str:
+    """Strong ETag for a collection, derived from the ETags of its items"""
+    digest = hashlib.sha256("".join(etags).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """Compressed representations need their own strong ETag, e.g. 'abc-gzip'"""
+    if not encoding:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _split_encoding(tag: str) -> Tuple[str, Optional[str]]:
+    """('"abc"', 'gzip') for '"abc-gzip"'; identity ETags have no encoding"""
+    for encoding in ("gzip", "br"):
+        suffix = f'-{encoding}"'
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"', encoding
+    return tag, None
+
+
+def _strip_encoding(tag: str) -> str:
+    return _split_encoding(tag)[0]
+
+
+def accepted_encodings(request: Request) -> Dict[str, float]:
+    """Content codings of the Accept-Encoding header -> quality"""
+    accepted = {}
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def _if_none_match_tags(request: Request) -> List[str]:
+    header = request.headers.get("if-none-match") or ""
+    return [tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()]
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    If-None-Match check (weak comparison, as RFC 9110 requires for GET).
+    Validators of compressed representations match their identity ETag.
+    """
+    tags = _if_none_match_tags(request)
+    if tags == ["*"]:
+        return True
+    return etag in {_strip_encoding(tag) for tag in tags}
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(request: Request, etag: str, cache_control: str) -> Response:
+    """
+    304 carrying the validator the client holds: the ETag of the encoding it
+    matched with, as long as the client still accepts that encoding (the one
+    the full response would have been sent in).
+    """
+    accepted = accepted_encodings(request)
+    encoding = None
+    for tag in _if_none_match_tags(request):
+        base, tag_encoding = _split_encoding(tag)
+        if base == etag and (
+            tag_encoding is None or accepted.get(tag_encoding, accepted.get("*", 0.0)) > 0
+        ):
+            encoding = tag_encoding
+            break
+
+    response = Response(status_code=304)
+    set_cache_headers(response, encoded_etag(etag, encoding), cache_control)
+    if encoding:
+        response.headers["Vary"] = "Accept-Encoding"
+    return response
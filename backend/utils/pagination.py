@@ -0,0 +1,35 @@
+"""Keyset (cursor) pagination helpers"""
+from fastapi import HTTPException, Request, Response
+from typing import Optional, Tuple
+import base64
+import json
+
+SortKey = Tuple[int, str]
+
+
+def encode_cursor(key: SortKey) -> str:
+    """Opaque cursor for the (order_index, id) of the last item on a page"""
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        order_index, item_id = json.loads(raw)
+        if not isinstance(order_index, int) or not isinstance(item_id, str):
+            raise ValueError(cursor)
+        return order_index, item_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def set_next_page(request: Request, response: Response, next_key: Optional[SortKey]) -> None:
+    """Advertises the next page in X-Next-Cursor and an RFC 8288 Link header"""
+    if next_key is None:
+        return
+
+    cursor = encode_cursor(next_key)
+    next_url = request.url.include_query_params(cursor=cursor)
+    response.headers["X-Next-Cursor"] = cursor
+    response.headers["Link"] = f'<{next_url}>; rel="next"'